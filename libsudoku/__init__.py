@@ -16,10 +16,43 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
-from .advanced import *
-from .parsers import ParsingError
-from .register import Register, discover
-from .solvers import Map, SolvingError
-from .sudoku import NativeSudoku
+from importlib import import_module
 
-__all__ = ('advanced', 'parsers', 'printers', 'register', 'solvers', 'sudoku')
+# Modules of the names importable from libsudoku. Names and modules are
+# imported when they are first used, so importing libsudoku is fast.
+_NAMES = {
+    'solve_many': 'batch', 
+    'validate_many': 'batch', 
+    'count_solutions': 'dlx', 
+    'is_unique': 'dlx', 
+    'ParsingError': 'parsers', 
+    'Register': 'register', 
+    'discover': 'register', 
+    'Map': 'solvers', 
+    'SolvingError': 'solvers', 
+    'Stats': 'stats', 
+    'NativeSudoku': 'sudoku', 
+    'solve_boards': 'vectorized'
+}
+
+__all__ = (
+    'advanced', 'batch', 'bench', 'binary', 'bitboard', 'cache', 'canonical', 
+    'dlx', 'encoding', 'generator', 'grader', 'parsers', 'printers', 
+    'register', 'service', 'solvers', 'stats', 'sudoku', 'techniques', 
+    'topology', 'vectorized'
+)
+
+def __getattr__(name:str) -> object:
+    if name in _NAMES:
+        value = getattr(import_module('.' + _NAMES[name], __name__), name)
+    elif name in __all__:
+        value = import_module('.' + name, __name__)
+    else:
+        raise AttributeError(
+            "module {!r} has no attribute {!r}".format(__name__, name)
+        )
+    globals()[name] = value
+    return value
+
+def __dir__() -> [str, ...]:
+    return sorted(set(globals()) | set(_NAMES) | set(__all__))
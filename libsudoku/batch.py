@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# 
+# Part of libsudoku library
+# Copyright (c) 2013, Tomi Leppänen
+# 
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from itertools import islice
+import os
+from . import encoding
+from .register import Register, discover
+from .stats import Stats
+from .sudoku import NativeSudoku, is_valid_cells
+
+def solve_chunk(
+        solver_name:str, 
+        collect_stats:bool, 
+        limit:"int or None", 
+        budget:"Budget or None", 
+        chunk:[bytes, ...]
+        ) -> [(int, object, "dict|None"), ...]:
+    """Solves sudokus given as 81 byte encodings with a registered solver
+    
+    Returns (kind, payload, stats) of every sudoku, the result encoded with
+    libsudoku.encoding and stats as a dict or None. Runs in worker
+    processes, so everything going in and out is plain data.
+    """
+    solver = Register.get_solver(solver_name)
+    results = []
+    for data in chunk:
+        stats = Stats() if collect_stats else None
+        kind, payload = encoding.solve(
+            solver, NativeSudoku.from_bytes(data), stats=stats, limit=limit, 
+            budget=budget
+        )
+        results.append(
+            (kind, payload, None if stats is None else stats.to_dict())
+        )
+    return results
+
+def _decode(
+        data:bytes, 
+        result:(int, object, "dict|None"), 
+        collect_stats:bool
+        ) -> "result or (result, Stats)":
+    kind, payload, stats = result
+    result = encoding.decode((kind, payload), NativeSudoku.from_bytes(data))
+    if collect_stats:
+        return result, Stats.from_dict(stats)
+    return result
+
+def _validate_chunk(data:bytes) -> [bool, ...]:
+    """Validates sudokus given as their cells one after another
+    
+    NumPy and is_valid_cells apply the same rules, so results don't depend
+    on whether NumPy is installed.
+    """
+    from . import vectorized # Imports NumPy, which is slow
+    if vectorized.numpy is not None:
+        boards = vectorized.numpy.frombuffer(data, dtype='uint16')
+        return vectorized.valid_array(boards.reshape(-1, 81)).tolist()
+    cells = memoryview(data).cast('H')
+    return [ is_valid_cells(cells[start : start+81]) 
+        for start in range(0, len(cells), 81) ]
+
+def chunks(items:"iterable", chunksize:int) -> "generator: [...]":
+    """Generator, yields lists of chunksize items, the last one may be shorter
+    
+    For example:
+    >>> list(chunks(range(5), 2))
+    [[0, 1], [2, 3], [4]]
+    """
+    iterator = iter(items)
+    while True:
+        chunk = list(islice(iterator, chunksize))
+        if not chunk:
+            return
+        yield chunk
+
+def map_chunks(
+        function:"function", 
+        chunks:"iterable of [...]", 
+        args:tuple=(), 
+        workers:int=None, 
+        ordered:bool=True
+        ) -> "generator: (int, [...], [...])":
+    """Generator, calls function(*args, chunk) for chunks in worker processes
+    
+    Only a few chunks per worker are in flight at a time, so chunks can be a
+    lazy iterable of any length. workers is the number of processes, by
+    default the number of CPUs; with 0 chunks are handled in this process.
+    Yields (index of the first item, chunk, result) in order of chunks, or
+    with ordered=False as soon as the results are ready. Function and
+    everything given to it must be picklable.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    index = 0
+    if workers == 0:
+        for chunk in chunks:
+            yield index, chunk, function(*args, chunk)
+            index += len(chunk)
+        return
+    chunks = iter(chunks)
+    with ProcessPoolExecutor(workers, initializer=discover) as executor:
+        pending = deque() # (first index, chunk, future)
+        while True:
+            while len(pending) < workers*2:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                pending.append(
+                    (index, chunk, executor.submit(function, *args, chunk))
+                )
+                index += len(chunk)
+            if not pending:
+                return
+            if ordered:
+                done = [ pending.popleft() ]
+            else:
+                finished, ignore = wait(
+                    [ future for first, chunk, future in pending ], 
+                    return_when=FIRST_COMPLETED
+                )
+                done = [ item for item in pending if item[2] in finished ]
+                for item in done:
+                    pending.remove(item)
+            for first, chunk, future in done:
+                yield first, chunk, future.result()
+
+def solve_many(
+        sudokus:"iterable of .sudoku.NativeSudoku", 
+        solver:str='dlx', 
+        workers:int=None, 
+        chunksize:int=64, 
+        ordered:bool=True, 
+        stats:bool=False, 
+        limit:int=None, 
+        budget:".solvers.Budget"=None
+        ) -> "generator":
+    """Generator, solves many sudokus using a pool of worker processes
+    
+    Sudokus are sent to workers with map_chunks in chunks of chunksize as
+    81 byte encodings, so the input can be a lazy iterable of any length.
+    See map_chunks for workers.
+    
+    Yields for each sudoku what the solver returns, or the SolvingError it
+    raised. Results are in input order, or with ordered=False as
+    (input index, result) tuples as soon as they are ready. With stats=True
+    every result is paired with the Stats collected while solving it. limit
+    and budget are given to the solver, with budget every sudoku gets all of
+    it and one taking too long can't hold up a worker.
+    """
+    if Register.get_solver(solver) is None:
+        raise ValueError("Invalid solver name {}".format(solver))
+    encoded = ( [ sudoku.to_bytes() for sudoku in chunk ] 
+        for chunk in chunks(sudokus, chunksize) )
+    results = map_chunks(
+        solve_chunk, encoded, (solver, stats, limit, budget), workers, 
+        ordered
+    )
+    for first, chunk, chunk_results in results:
+        for offset, (data, result) in enumerate(zip(chunk, chunk_results)):
+            result = _decode(data, result, stats)
+            yield result if ordered else (first + offset, result)
+
+def validate_many(
+        sudokus:"iterable of .sudoku.NativeSudoku", 
+        workers:int=None, 
+        chunksize:int=4096
+        ) -> "generator: bool":
+    """Generator, tells for many sudokus whether they are valid
+    
+    Sudokus are sent to workers with map_chunks in chunks of chunksize as
+    their raw cells and are checked a chunk at a time with NumPy when it is
+    installed. Yields whether each sudoku is valid in input order.
+    """
+    encoded = ( b''.join(sudoku.cells.tobytes() for sudoku in chunk) 
+        for chunk in chunks(sudokus, chunksize) )
+    results = map_chunks(_validate_chunk, encoded, workers=workers)
+    for first, chunk, chunk_results in results:
+        yield from chunk_results
@@ -0,0 +1,362 @@
+#!/usr/bin/env python3
+# 
+# Part of libsudoku library
+# Copyright (c) 2013, Tomi Leppänen
+# 
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Benchmarks for registered solvers
+
+Run with python -m libsudoku.bench. Every solver is run against corpora of
+one sudoku per line, by default the ones in libsudoku/corpora, and puzzles
+per second, latency percentiles and peak memory are reported per solver and
+corpus, along with the cold start time of solver.py. Results can be saved as
+JSON and compared to an earlier run.
+
+The generated corpus is the puzzles of generator.generate_many(500, 2013),
+large enough for a p99 latency that isn't just the slowest puzzle.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from .parsers import ParsingError, parse_lines
+from .register import Register
+from .solvers import SolvingError
+
+CORPORA_DIR = os.path.join(os.path.dirname(__file__), 'corpora')
+CORPORA = ('easy', 'hard', '17-clue', 'multiple', 'invalid', 'generated')
+
+# Puzzles needed for p99 latency to be compared, with fewer it is about the
+# same as the maximum and compared runs differ by noise
+MIN_P99_PUZZLES = 100
+SOLVER_SCRIPT = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'solver.py'
+)
+
+def load_corpus(path:str) -> "[.sudoku.NativeSudoku, ...]":
+    """Loads a corpus file of one sudoku per line"""
+    with open(path) as file_:
+        return [ sudoku for sudoku in parse_lines(file_, 'native') 
+            if not isinstance(sudoku, ParsingError) ]
+
+def percentile(values:[float, ...], percent:float) -> float:
+    """Returns percentile of sorted values using the nearest rank
+    
+    For example:
+    >>> percentile([1, 2, 3, 4], 50)
+    2
+    >>> percentile([1, 2, 3, 4], 99)
+    4
+    """
+    if not values:
+        return 0.0
+    rank = max(1, -(-len(values) * percent // 100))
+    return values[int(rank) - 1]
+
+def run_solver(
+        solver:"function", 
+        sudokus:"[.sudoku.NativeSudoku, ...]", 
+        repeat:int=1, 
+        max_seconds:float=None, 
+        memory:bool=True
+        ) -> dict:
+    """Runs solver on sudokus and returns measurements as a dict
+    
+    Every sudoku is solved repeat times. Solving stops after max_seconds,
+    the sudokus solved until then are reported. Peak memory is measured in a
+    separate pass with tracemalloc, as tracing slows solving down.
+    """
+    latencies = []
+    solved = failed = 0
+    started = time.perf_counter()
+    for round_ in range(repeat):
+        for sudoku in sudokus:
+            start = time.perf_counter()
+            try:
+                solver(sudoku.copy())
+                solved += 1
+            except SolvingError:
+                failed += 1
+            end = time.perf_counter()
+            latencies.append(end - start)
+            if max_seconds is not None and end - started > max_seconds:
+                break
+        else:
+            continue
+        break
+    total = sum(latencies)
+    latencies.sort()
+    result = {
+        'puzzles': len(latencies), 
+        'solved': solved, 
+        'failed': failed, 
+        'complete': len(latencies) == len(sudokus) * repeat, 
+        'seconds': total, 
+        'puzzles_per_second': len(latencies) / total if total else 0.0, 
+        'p50_ms': percentile(latencies, 50) * 1000, 
+        'p99_ms': percentile(latencies, 99) * 1000, 
+        'peak_memory_bytes': None
+    }
+    if memory:
+        tracemalloc.start()
+        try:
+            for sudoku in sudokus[:len(latencies)]:
+                try:
+                    solver(sudoku.copy())
+                except SolvingError:
+                    pass
+            result['peak_memory_bytes'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result
+
+def _run_commands(command:[str, ...], repeat:int) -> [float, ...]:
+    """Runs command repeat times, returns sorted seconds of the runs"""
+    times = []
+    for round_ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, stdout=subprocess.DEVNULL, check=True)
+        times.append(time.perf_counter() - start)
+    times.sort()
+    return times
+
+def run_startup(solver:str='dlx', repeat:int=10) -> "dict or None":
+    """Measures cold starts of solver.py solving one easy sudoku
+    
+    Every run is a new interpreter, like a short call from a shell, and the
+    startup of a bare interpreter is measured for comparison. Returns None
+    if solver.py isn't next to libsudoku.
+    """
+    if not os.path.exists(SOLVER_SCRIPT):
+        return None
+    with open(os.path.join(CORPORA_DIR, 'easy.txt')) as file_:
+        sudoku = file_.readline().strip()
+    interpreter = _run_commands([sys.executable, '-c', 'pass'], repeat)
+    times = _run_commands([
+        sys.executable, SOLVER_SCRIPT, '-r', 'native', '-s', solver, 
+        '-p', 'none', '-i', sudoku
+    ], repeat)
+    return {
+        'solver': solver, 
+        'runs': repeat, 
+        'p50_ms': percentile(times, 50) * 1000, 
+        'min_ms': times[0] * 1000, 
+        'interpreter_ms': percentile(interpreter, 50) * 1000
+    }
+
+def run(
+        solvers:[str, ...]=None, 
+        corpora:{str: str}=None, 
+        repeat:int=1, 
+        max_seconds:float=None, 
+        memory:bool=True, 
+        startup:int=0
+        ) -> dict:
+    """Runs solvers against corpora and returns a report as a dict
+    
+    Corpora are given as {name: path}, by default the bundled corpora.
+    Solvers default to all registered solvers. With startup, the cold start
+    of solver.py is measured that many times (see run_startup).
+    """
+    if solvers is None:
+        solvers = Register.get_solvers()
+    if corpora is None:
+        corpora = { name: os.path.join(CORPORA_DIR, name + '.txt') 
+            for name in CORPORA }
+    loaded = { name: load_corpus(path) for name, path in corpora.items() }
+    results = {}
+    for name in solvers:
+        solver = Register.get_solver(name)
+        if solver is None:
+            raise ValueError("Invalid solver name {}".format(name))
+        results[name] = {
+            corpus: run_solver(solver, sudokus, repeat, max_seconds, memory)
+            for corpus, sudokus in loaded.items()
+        }
+    return {
+        'python': platform.python_version(), 
+        'implementation': platform.python_implementation(), 
+        'machine': platform.machine(), 
+        'repeat': repeat, 
+        'results': results, 
+        'startup': run_startup(repeat=startup) if startup else None
+    }
+
+def compare(
+        report:dict, 
+        baseline:dict, 
+        threshold:float=0.2
+        ) -> "[str, ...]":
+    """Returns descriptions of regressions of report against baseline
+    
+    A solver and corpus regresses if its puzzles per second dropped or its
+    p99 latency grew by more than threshold (as a fraction), and so does the
+    startup if its median grew by more than that. p99 is compared only when
+    both runs solved at least MIN_P99_PUZZLES puzzles.
+    """
+    regressions = []
+    startup, old = report.get('startup'), baseline.get('startup')
+    if startup and old and \
+            startup['p50_ms'] > old['p50_ms'] * (1 + threshold):
+        regressions.append("startup: {:.1f} -> {:.1f} ms".format(
+            old['p50_ms'], startup['p50_ms']
+        ))
+    for solver, corpora in report['results'].items():
+        for corpus, result in corpora.items():
+            old = baseline['results'].get(solver, {}).get(corpus)
+            if old is None or not old['complete'] or not result['complete']:
+                continue
+            if result['puzzles_per_second'] < \
+                    old['puzzles_per_second'] * (1 - threshold):
+                regressions.append("{} {}: {:.1f} -> {:.1f} puzzles/s".format(
+                    solver, corpus, 
+                    old['puzzles_per_second'], result['puzzles_per_second']
+                ))
+            if min(result['puzzles'], old['puzzles']) < MIN_P99_PUZZLES:
+                continue
+            if result['p99_ms'] > old['p99_ms'] * (1 + threshold):
+                regressions.append("{} {}: p99 {:.3f} -> {:.3f} ms".format(
+                    solver, corpus, old['p99_ms'], result['p99_ms']
+                ))
+    return regressions
+
+def format_report(report:dict) -> str:
+    """Returns the report as a human readable table"""
+    lines = ["{:<10} {:<10} {:>7} {:>7} {:>11} {:>10} {:>10} {:>10}".format(
+        "solver", "corpus", "solved", "failed", "puzzles/s", "p50 ms", 
+        "p99 ms", "peak KiB"
+    )]
+    for solver, corpora in report['results'].items():
+        for corpus, result in corpora.items():
+            memory = result['peak_memory_bytes']
+            lines.append(
+                "{:<10} {:<10} {:>7} {:>7} {:>11.1f} {:>10.3f} {:>10.3f} "
+                "{:>10}{}".format(
+                    solver, corpus, result['solved'], result['failed'], 
+                    result['puzzles_per_second'], result['p50_ms'], 
+                    result['p99_ms'], 
+                    "-" if memory is None else memory // 1024, 
+                    "" if result['complete'] else " (stopped)"
+                )
+            )
+    startup = report.get('startup')
+    if startup:
+        lines.append(
+            "startup of solver.py with {}: p50 {:.1f} ms, min {:.1f} ms, "
+            "bare interpreter {:.1f} ms".format(
+                startup['solver'], startup['p50_ms'], startup['min_ms'], 
+                startup['interpreter_ms']
+            )
+        )
+    return "\n".join(lines)
+
+def parse_arguments(*args) -> "Namespace":
+    parser = argparse.ArgumentParser(description="libsudoku benchmarks")
+    parser.add_argument(
+        '-s', '--solver', 
+        action='append', 
+        dest='solvers', 
+        metavar='SOLVER', 
+        help="Solver to benchmark, may be repeated (default: all)"
+    )
+    parser.add_argument(
+        '-c', '--corpus', 
+        action='append', 
+        dest='corpora', 
+        metavar='NAME[=FILE]', 
+        help="Bundled corpus name or NAME=FILE of one sudoku per line, "
+            "may be repeated (default: all bundled corpora)"
+    )
+    parser.add_argument(
+        '-n', '--repeat', 
+        type=int, 
+        default=1, 
+        help="Times to solve every sudoku (default: %(default)s)"
+    )
+    parser.add_argument(
+        '-t', '--max-seconds', 
+        type=float, 
+        default=10.0, 
+        help="Time limit per solver and corpus (default: %(default)s)"
+    )
+    parser.add_argument(
+        '--no-memory', 
+        action='store_false', 
+        dest='memory', 
+        help="Don't measure peak memory"
+    )
+    parser.add_argument(
+        '--startup', 
+        type=int, 
+        default=10, 
+        metavar='N', 
+        help="Cold starts of solver.py to measure, 0 to skip "
+            "(default: %(default)s)"
+    )
+    parser.add_argument(
+        '-o', '--output', 
+        metavar='FILE', 
+        help="Write the report as JSON to FILE. Use - for stdout"
+    )
+    parser.add_argument(
+        '--compare', 
+        metavar='FILE', 
+        help="Compare to a JSON report and fail on regressions"
+    )
+    parser.add_argument(
+        '--threshold', 
+        type=float, 
+        default=0.2, 
+        help="Allowed slowdown as a fraction (default: %(default)s)"
+    )
+    return parser.parse_args(args or None)
+
+def main(*args) -> int:
+    args = parse_arguments(*args)
+    corpora = None
+    if args.corpora:
+        corpora = {}
+        for corpus in args.corpora:
+            name, sep, path = corpus.partition('=')
+            corpora[name] = path if sep else \
+                os.path.join(CORPORA_DIR, name + '.txt')
+    report = run(
+        args.solvers, corpora, args.repeat, args.max_seconds, args.memory, 
+        args.startup
+    )
+    if args.output == '-':
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        print(format_report(report))
+        if args.output:
+            with open(args.output, 'w') as file_:
+                json.dump(report, file_, indent=2)
+    if args.compare:
+        with open(args.compare) as file_:
+            regressions = compare(report, json.load(file_), args.threshold)
+        for regression in regressions:
+            print("Regression: {}".format(regression), file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# 
+# Part of libsudoku library
+# Copyright (c) 2013, Tomi Leppänen
+# 
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Binary sudoku files
+
+A file starts with a 32 byte header: magic b'LSDK', version, flags, number
+of records, record size and length of metadata, all little endian. Records
+follow the header. Every record is a sudoku packed to 41 bytes, two cells
+per byte with the first cell in the high nibble, followed by its solution
+packed the same way if the file has solutions. Metadata, if any, is JSON
+after the records.
+"""
+
+import argparse
+from itertools import zip_longest
+import json
+import mmap
+import struct
+import sys
+from .parsers import ParsingError, parse_lines
+from .sudoku import NativeSudoku
+
+MAGIC = b'LSDK'
+VERSION = 1
+HEADER = struct.Struct('<4sHHQHI10x')
+PACKED_SIZE = 41
+
+# Flags
+SOLUTIONS = 1
+
+# Translation tables from bytes to their high and low nibbles and from
+# digits to high nibbles
+_HIGH_NIBBLES = bytes(byte >> 4 for byte in range(256))
+_LOW_NIBBLES = bytes(byte & 0xF for byte in range(256))
+_TO_HIGH = bytes(byte << 4 & 0xFF for byte in range(256))
+
+def pack(sudoku:".sudoku.NativeSudoku") -> bytes:
+    """Returns a sudoku packed to 41 bytes"""
+    digits = sudoku.to_bytes() + b'\0'
+    high = int.from_bytes(digits[0::2].translate(_TO_HIGH), 'big')
+    return (high | int.from_bytes(digits[1::2], 'big')).to_bytes(41, 'big')
+
+def _unpack_block(data:bytes) -> bytearray:
+    """Returns the digits of packed bytes, two for every byte"""
+    digits = bytearray(2*len(data))
+    digits[0::2] = data.translate(_HIGH_NIBBLES)
+    digits[1::2] = data.translate(_LOW_NIBBLES)
+    return digits
+
+def unpack(data:"bytes|memoryview") -> ".sudoku.NativeSudoku":
+    """Returns a sudoku from 41 packed bytes"""
+    return NativeSudoku.from_bytes(_unpack_block(bytes(data[:41]))[:81])
+
+def write(
+        path:str, 
+        sudokus:"iterable of .sudoku.NativeSudoku", 
+        solutions:"iterable of .sudoku.NativeSudoku"=None, 
+        metadata:dict=None
+        ) -> int:
+    """Writes sudokus and optionally their solutions to a binary file
+    
+    Sudokus are written as they come, so they can be a lazy iterable of any
+    length. metadata must be a dict that can be dumped as JSON. Returns the
+    number of sudokus written. Raises ValueError if there are more sudokus
+    than solutions or the other way round, the file is left without header.
+    """
+    flags = 0 if solutions is None else SOLUTIONS
+    record_size = PACKED_SIZE if solutions is None else 2*PACKED_SIZE
+    count = 0
+    with open(path, 'wb') as file_:
+        file_.write(bytes(HEADER.size))
+        if solutions is None:
+            for sudoku in sudokus:
+                file_.write(pack(sudoku))
+                count += 1
+        else:
+            missing = object()
+            for sudoku, solution in zip_longest(
+                    sudokus, solutions, fillvalue=missing):
+                if sudoku is missing or solution is missing:
+                    raise ValueError(
+                        "Numbers of sudokus and solutions are different"
+                    )
+                file_.write(pack(sudoku) + pack(solution))
+                count += 1
+        data = b''
+        if metadata is not None:
+            data = json.dumps(metadata).encode()
+            file_.write(data)
+        file_.seek(0)
+        file_.write(HEADER.pack(
+            MAGIC, VERSION, flags, count, record_size, len(data)
+        ))
+    return count
+
+def convert(
+        lines:"file or iterable of str", 
+        path:str, 
+        parser_name:str='native', 
+        metadata:dict=None
+        ) -> (int, int):
+    """Converts sudokus in text, one per line, to a binary file
+    
+    Lines are parsed with a registered parser, lines that fail to parse are
+    skipped. Returns the numbers of sudokus written and lines skipped.
+    """
+    skipped = 0
+    def parsed():
+        nonlocal skipped
+        for sudoku in parse_lines(lines, parser_name):
+            if isinstance(sudoku, ParsingError):
+                skipped += 1
+            else:
+                yield sudoku
+    return write(path, parsed(), metadata=metadata), skipped
+
+class BinaryReader:
+    """Reader of binary sudoku files
+    
+    The file is memory mapped, so opening it takes the same time whatever
+    its size and only records that are accessed are read. Records can be
+    accessed by index and iterated, and raw gives them without copying.
+    """
+    def __init__(self, path:str):
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(
+                self._file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+        except ValueError: # Empty file
+            self._file.close()
+            raise ValueError("Not a libsudoku binary file")
+        if len(self._map) < HEADER.size:
+            self.close()
+            raise ValueError("Not a libsudoku binary file")
+        magic, version, self.flags, self.count, self.record_size, \
+            self._metadata_length = HEADER.unpack_from(self._map)
+        end = HEADER.size + self.count*self.record_size
+        if magic != MAGIC or version > VERSION or \
+                len(self._map) < end + self._metadata_length:
+            self.close()
+            raise ValueError("Not a libsudoku binary file")
+        self._records = memoryview(self._map)[HEADER.size : end]
+    
+    def __enter__(self) -> "BinaryReader":
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def __getitem__(self, index:int) -> ".sudoku.NativeSudoku":
+        return unpack(self.raw(index))
+    
+    def __iter__(self) -> "generator: .sudoku.NativeSudoku":
+        return self.sudokus()
+    
+    def close(self):
+        """Closes the file, views given by raw must be released first"""
+        if getattr(self, '_records', None) is not None:
+            self._records.release()
+            self._records = None
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+    
+    @property
+    def has_solutions(self) -> bool:
+        return bool(self.flags & SOLUTIONS)
+    
+    @property
+    def metadata(self) -> "dict or None":
+        """Metadata of the file or None"""
+        if not self._metadata_length:
+            return None
+        start = HEADER.size + self.count*self.record_size
+        return json.loads(
+            self._map[start : start + self._metadata_length].decode()
+        )
+    
+    def _index(self, index:int) -> int:
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("Record index out of range")
+        return index
+    
+    def raw(self, index:int) -> memoryview:
+        """Returns the packed record at index as a view of the file"""
+        start = self._index(index)*self.record_size
+        return self._records[start : start + self.record_size]
+    
+    def solution(self, index:int) -> ".sudoku.NativeSudoku":
+        """Returns the solution of the sudoku at index"""
+        if not self.has_solutions:
+            raise ValueError("File has no solutions")
+        return unpack(self.raw(index)[PACKED_SIZE:])
+    
+    def sudokus(
+            self, 
+            start:int=0, 
+            stop:int=None, 
+            solutions:bool=False, 
+            block_size:int=4096
+            ) -> "generator":
+        """Generator, yields sudokus from start to stop
+        
+        Records are unpacked block_size at a time, and a range of records can
+        be given to read only a shard of the file. With solutions=True yields
+        (sudoku, solution) tuples.
+        """
+        if solutions and not self.has_solutions:
+            raise ValueError("File has no solutions")
+        start, stop, step = slice(start, stop).indices(self.count)
+        size = self.record_size
+        for block_start in range(start, stop, block_size):
+            block_stop = min(block_start + block_size, stop)
+            digits = _unpack_block(
+                self._records[block_start*size : block_stop*size].tobytes()
+            )
+            for offset in range(0, len(digits), 2*size):
+                sudoku = NativeSudoku.from_bytes(digits[offset : offset+81])
+                if solutions:
+                    offset += 2*PACKED_SIZE
+                    yield sudoku, NativeSudoku.from_bytes(
+                        digits[offset : offset+81]
+                    )
+                else:
+                    yield sudoku
+
+def parse_arguments(*args) -> "Namespace":
+    parser = argparse.ArgumentParser(
+        description="Converts sudokus to a libsudoku binary file"
+    )
+    parser.add_argument(
+        'input', 
+        nargs='?', 
+        type=argparse.FileType('r'), 
+        default=sys.stdin, 
+        help="File of one sudoku per line (default: stdin)"
+    )
+    parser.add_argument('output', help="Binary file to write")
+    parser.add_argument(
+        '-p', '--parser', 
+        default='native', 
+        help="Parser for the lines (default: %(default)s)"
+    )
+    return parser.parse_args(args if args else None)
+
+def main(*args) -> int:
+    args = parse_arguments(*args)
+    written, skipped = convert(args.input, args.output, args.parser)
+    print("Wrote {} sudokus, skipped {} lines".format(written, skipped))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
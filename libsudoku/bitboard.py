@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+# 
+# Part of libsudoku library
+# Copyright (c) 2013, Tomi Leppänen
+# 
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Solver working on digit planes of the whole board
+
+The board is nine 81 bit integers, one plane per digit, bit n of a plane
+being set if the digit is still possible in cell n. Cells that are solved
+have their digit only. Singles are found and placed for the whole board at
+once with integer operations, which Python does in C.
+"""
+
+from .register import Register
+from .solvers import Budget, SolvingError, collect_solutions
+from .sudoku import NativeSudoku
+from .topology import BIT_TO_DIGIT, PEERS, UNITS
+
+ALL_CELLS = (1 << 81) - 1
+
+# Cells of every unit and peers of every cell as 81 bit masks
+UNIT_MASKS = tuple(sum(1 << index for index in unit) for unit in UNITS)
+PEER_MASKS = tuple(sum(1 << peer for peer in peers) for peers in PEERS)
+
+def _assign(planes:[int, ...], solved:int, assigned:[int, ...]) -> "int|None":
+    """Places digits to cells, returns the solved cells or None if broken
+    
+    assigned has the cells getting every digit as a plane. The digit is
+    removed from the peers of those cells and the other digits from the
+    cells, all at once for every digit.
+    """
+    new = 0
+    for cells in assigned:
+        if new & cells: # A cell gets two digits
+            return None
+        new |= cells
+    keep = ~new
+    for digit, cells in enumerate(assigned):
+        if not cells:
+            planes[digit] &= keep
+            continue
+        peers = 0
+        rest = cells
+        while rest:
+            cell = rest & -rest
+            peers |= PEER_MASKS[cell.bit_length() - 1]
+            rest ^= cell
+        if peers & cells: # Peers get the same digit
+            return None
+        planes[digit] = planes[digit] & keep & ~peers | cells
+    return solved | new
+
+def _propagate(planes:[int, ...], solved:int) -> "int|None":
+    """Fills in naked and hidden singles until there are none
+    
+    Returns the solved cells or None if the board is broken.
+    """
+    while True:
+        ones = twos = 0 # Cells with at least one and two digits
+        for plane in planes:
+            twos |= ones & plane
+            ones |= plane
+        if ones != ALL_CELLS: # A cell has no digits left
+            return None
+        unsolved = ALL_CELLS & ~solved
+        singles = unsolved & ~twos
+        assigned = [ plane & singles for plane in planes ]
+        found = singles
+        for digit, plane in enumerate(planes):
+            free = plane & unsolved
+            if not free:
+                if bin(plane).count('1') != 9: # Digit is missing from units
+                    return None
+                continue
+            for unit in UNIT_MASKS:
+                places = free & unit
+                if places & (places - 1) == 0:
+                    if places:
+                        assigned[digit] |= places
+                        found |= places
+                    elif not plane & unit: # Digit can't go to the unit
+                        return None
+        if not found:
+            return solved
+        solved = _assign(planes, solved, assigned)
+        if solved is None:
+            return None
+
+def _to_sudoku(planes:[int, ...]) -> ".sudoku.NativeSudoku":
+    """Returns a solved board as a sudoku"""
+    digits = bytearray(81)
+    for digit, plane in enumerate(planes, 1):
+        while plane:
+            cell = plane & -plane
+            digits[cell.bit_length() - 1] = digit
+            plane ^= cell
+    return NativeSudoku.from_bytes(bytes(digits))
+
+@Register.iterator(name='bitboard')
+def iterate_bitboard_solutions(
+        sudoku:".sudoku.NativeSudoku", 
+        stats:".stats.Stats"=None, 
+        budget:Budget=None
+        ) -> "generator: .sudoku.NativeSudoku":
+    """Generator, yields solutions as the search on digit planes finds them
+    
+    Search is depth first. Singles are filled in for the whole board, and
+    then an unsolved cell with two digits, or else the first unsolved cell,
+    is split. Every branch gets a copy of the nine planes.
+    
+    With stats, counts nodes, branches, dead ends and solutions in total and
+    per search depth. With budget, raises BudgetExceeded when it runs out.
+    """
+    if not sudoku.is_valid():
+        raise SolvingError("Broken sudoku, didn't start solving", sudoku=sudoku)
+    meter = None if budget is None else budget.start()
+    assigned = [ 0 ] * 9
+    for index, value in enumerate(sudoku.cells):
+        if value:
+            assigned[BIT_TO_DIGIT[value] - 1] |= 1 << index
+    planes = [ ALL_CELLS ] * 9
+    solved = _assign(planes, 0, assigned)
+    stack = [ (planes, solved, 0) ] # (planes, solved cells, depth)
+    while stack:
+        planes, solved, depth = stack.pop()
+        if meter is not None:
+            meter.node()
+        if stats is not None:
+            stats.count('nodes')
+            stats.count_level(depth, 'nodes')
+        if solved is not None:
+            solved = _propagate(planes, solved)
+        if solved is None:
+            if stats is not None:
+                stats.count('dead_ends')
+                stats.count_level(depth, 'dead_ends')
+            continue
+        if solved == ALL_CELLS:
+            if meter is not None:
+                meter.solution()
+            if stats is not None:
+                stats.count('solutions')
+            yield _to_sudoku(planes)
+            continue
+        ones = twos = threes = 0
+        for plane in planes:
+            threes |= twos & plane
+            twos |= ones & plane
+            ones |= plane
+        unsolved = ALL_CELLS & ~solved
+        cells = unsolved & ~threes or unsolved
+        cell = cells & -cells
+        keep = ~cell
+        for digit in range(8, -1, -1): # Smallest digit is tried first
+            if planes[digit] & cell:
+                if stats is not None:
+                    stats.count('branches')
+                    stats.count_level(depth, 'branches')
+                branch = [ plane & keep for plane in planes ]
+                branch[digit] = planes[digit]
+                stack.append((branch, solved, depth + 1))
+
+@Register.solver(name='bitboard')
+def bitboard_solver(
+        sudoku:".sudoku.NativeSudoku", 
+        stats:".stats.Stats"=None, 
+        limit:int=None, 
+        budget:Budget=None
+        ) -> "[.sudoku.NativeSudoku, ...]":
+    """Solver using digit planes to find all or limit solutions
+    
+    See iterate_bitboard_solutions for the search. BudgetExceeded has the
+    solutions found before the budget ran out.
+    """
+    return collect_solutions(
+        iterate_bitboard_solutions(sudoku, stats, budget), sudoku, limit
+    )
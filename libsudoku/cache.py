@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+# 
+# Part of libsudoku library
+# Copyright (c) 2013, Tomi Leppänen
+# 
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from collections import OrderedDict
+import shelve
+from . import encoding
+from .canonical import canonicalize
+from .register import Register
+from .solvers import SolvingError
+from .stats import Stats
+
+class SolutionCache:
+    """Cache of solver results with least recently used eviction
+    
+    Results are kept by solver name and the sudoku as 81 bytes, or with
+    canonical=True by its canonical form, so that all equivalent sudokus
+    share one entry. At most max_entries entries and max_bytes bytes of keys
+    and results are kept in memory, None meaning no limit.
+    
+    With path, results are also stored to a shelve database there and looked
+    up from it when they are not in memory. Call close() or use the cache as
+    a context manager to write the database.
+    
+    Hits, disk hits, misses and evictions are counted to stats.
+    
+    Results of solving done elsewhere can be kept too: key gives the key
+    and the sudoku to solve, lookup and put get and store results encoded
+    with libsudoku.encoding and result decodes them.
+    """
+    def __init__(
+            self, 
+            max_entries:int=4096, 
+            max_bytes:int=None, 
+            canonical:bool=False, 
+            path:str=None
+            ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.canonical = canonical
+        self.stats = Stats()
+        self.size = 0
+        self._entries = OrderedDict()
+        self._shelf = None if path is None else shelve.open(path)
+    
+    def __enter__(self) -> "SolutionCache":
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def close(self):
+        """Closes the database if there is one"""
+        if self._shelf is not None:
+            self._shelf.close()
+            self._shelf = None
+    
+    def clear(self):
+        """Removes all results kept in memory"""
+        self._entries.clear()
+        self.size = 0
+    
+    def _store(self, key:bytes, entry:(int, object)):
+        kind, payload = entry
+        if kind == encoding.MANY:
+            size = len(key) + 81*len(payload)
+        else:
+            size = len(key) + len(payload)
+        old = self._entries.pop(key, None)
+        if old is not None: # Stored again, counted only once
+            self.size -= old[1]
+        self._entries[key] = (entry, size)
+        self.size += size
+        while self._entries and (
+                self.max_entries is not None and
+                len(self._entries) > self.max_entries or
+                self.max_bytes is not None and self.size > self.max_bytes):
+            entry, size = self._entries.popitem(last=False)[1]
+            self.size -= size
+            self.stats.count('evictions')
+    
+    def lookup(self, key:bytes) -> "(int, object) or None":
+        """Returns the encoded result kept by key or None"""
+        item = self._entries.get(key)
+        if item is not None:
+            self._entries.move_to_end(key)
+            self.stats.count('hits')
+            return item[0]
+        if self._shelf is not None:
+            entry = self._shelf.get(key.hex())
+            if entry is not None:
+                self.stats.count('disk_hits')
+                self._store(key, entry)
+                return entry
+        self.stats.count('misses')
+        return None
+    
+    def key(
+            self, 
+            sudoku:".sudoku.NativeSudoku", 
+            solver:str, 
+            limit:int=None
+            ) -> "(bytes, .sudoku.NativeSudoku, Transform or None)":
+        """Returns the key, the sudoku to solve and the transform to revert"""
+        name = solver if limit is None else "{}/{}".format(solver, limit)
+        if self.canonical:
+            form, transform = canonicalize(sudoku)
+            return name.encode() + b':' + form.to_bytes(), form, transform
+        return name.encode() + b':' + sudoku.to_bytes(), sudoku, None
+    
+    def result(
+            self, 
+            entry:(int, object), 
+            sudoku:".sudoku.NativeSudoku", 
+            transform:"Transform or None"
+            ) -> "what the solver returns":
+        """Returns the result of an entry for sudoku or raises its error
+    
+        transform is the one given by key, solutions are reverted with it.
+        """
+        result = encoding.decode(
+            entry, sudoku, None if transform is None else transform.revert
+        )
+        if isinstance(result, SolvingError):
+            raise result
+        return result
+    
+    def put(self, key:bytes, entry:(int, object)):
+        """Stores an entry to memory and to the database if there is one"""
+        self._store(key, entry)
+        if self._shelf is not None:
+            self._shelf[key.hex()] = entry
+    
+    def solve(
+            self, 
+            sudoku:".sudoku.NativeSudoku", 
+            solver:str='dlx', 
+            stats:".stats.Stats"=None, 
+            limit:int=None, 
+            budget:".solvers.Budget"=None
+            ) -> "what the solver returns":
+        """Solves a sudoku with a registered solver or returns cached result
+        
+        SolvingErrors are cached as well and raised again on hits, except
+        BudgetExceeded, as another call may have more budget. Results are
+        kept separately for every limit. stats and budget are given to the
+        solver only when it is called.
+        """
+        function = Register.get_solver(solver)
+        if function is None:
+            raise ValueError("Invalid solver name {}".format(solver))
+        key, form, transform = self.key(sudoku, solver, limit)
+        entry = self.lookup(key)
+        if entry is None:
+            entry = encoding.solve(
+                function, form.copy(), stats=stats, limit=limit, budget=budget
+            )
+            if entry[0] != encoding.BUDGET:
+                self.put(key, entry)
+        return self.result(entry, sudoku, transform)
+    
+    def get_solver(self, name:str) -> "function":
+        """Returns a solver function using the named solver through the cache"""
+        def cached_solver(
+                sudoku:".sudoku.NativeSudoku", 
+                stats:".stats.Stats"=None, 
+                limit:int=None, 
+                budget:".solvers.Budget"=None
+                ):
+            return self.solve(sudoku, name, stats, limit, budget)
+        cached_solver.__name__ = 'cached_' + name
+        return cached_solver
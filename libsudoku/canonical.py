@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+# 
+# Part of libsudoku library
+# Copyright (c) 2013, Tomi Leppänen
+# 
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Canonical form of sudokus
+
+Sudokus are equivalent if one can be made from the other by transposing,
+swapping bands or stacks, swapping rows inside bands or cols inside stacks
+and relabeling digits. The canonical form is the equivalent sudoku that is
+the smallest when read row by row, empty cells counting as larger than any
+digit, so clues are gathered to the top left.
+"""
+
+from hashlib import blake2b
+from itertools import permutations, product
+from .sudoku import NativeSudoku
+from .topology import BIT_TO_DIGIT, DIGIT_TO_BIT
+
+_EMPTY = 10 # Empty cells sort after all digits
+
+# Best pattern of clues and the col orders giving it by clues of a row
+_best_orders = {}
+
+def _orders(mask:int) -> "(int, (tuple, ...))":
+    """Returns col orders moving the clues of a row the most to the left
+    
+    Those take stacks from the most clues to the least and inside every
+    stack take the clues first. The pattern has a bit set for every empty
+    cell, the first col being the highest bit.
+    """
+    result = _best_orders.get(mask)
+    if result is None:
+        stacks = []
+        for stack in range(3):
+            cols = range(stack*3, stack*3 + 3)
+            clues = [ col for col in cols if mask >> col & 1 ]
+            empty = [ col for col in cols if not mask >> col & 1 ]
+            stacks.append((len(clues), [ first + second
+                for first in permutations(clues)
+                for second in permutations(empty) ]))
+        counts = sorted((count for count, inner in stacks), reverse=True)
+        orders = []
+        for blocks in permutations(range(3)):
+            if [ stacks[block][0] for block in blocks ] == counts:
+                orders.extend(sum(inner, ()) for inner in product(
+                    *(stacks[block][1] for block in blocks)
+                ))
+        pattern = 0
+        for count in counts:
+            pattern = pattern << 3 | (0b111 >> count)
+        result = _best_orders[mask] = (pattern, tuple(orders))
+    return result
+
+class Transform:
+    """Transformation from a sudoku to its canonical form
+    
+    transpose tells whether the sudoku is transposed first, rows and cols
+    are the orders in which rows and cols are taken from the (transposed)
+    sudoku, and labels has the new digit of every digit.
+    """
+    __slots__ = ('transpose', 'rows', 'cols', 'labels', '_sources')
+    
+    def __init__(
+            self, 
+            transpose:bool, 
+            rows:(int, ...), 
+            cols:(int, ...), 
+            labels:(int, ...)
+            ):
+        self.transpose = transpose
+        self.rows = tuple(rows)
+        self.cols = tuple(cols)
+        self.labels = tuple(labels)
+        if transpose:
+            self._sources = tuple(col*9 + row for row in rows for col in cols)
+        else:
+            self._sources = tuple(row*9 + col for row in rows for col in cols)
+    
+    def __eq__(self, obj:"Transform") -> bool:
+        if not isinstance(obj, Transform):
+            return False
+        return (self.transpose, self.rows, self.cols, self.labels) == \
+            (obj.transpose, obj.rows, obj.cols, obj.labels)
+    
+    def __repr__(self):
+        return "Transform({}, {}, {}, {})".format(
+            self.transpose, self.rows, self.cols, self.labels
+        )
+    
+    def apply(self, sudoku:".sudoku.NativeSudoku") -> ".sudoku.NativeSudoku":
+        """Returns the sudoku transformed"""
+        cells = sudoku.cells
+        labels = self.labels
+        return NativeSudoku.from_cells(
+            DIGIT_TO_BIT[labels[BIT_TO_DIGIT[cells[source]]]]
+            for source in self._sources
+        )
+    
+    def revert(self, sudoku:".sudoku.NativeSudoku") -> ".sudoku.NativeSudoku":
+        """Returns the transformed sudoku back as it was
+        
+        Solutions of a canonical form can be reverted to solutions of the
+        sudoku the transform was made for, as long as all digits appear in
+        the sudoku or relabel to themselves.
+        """
+        digits = list(range(10))
+        for digit, label in enumerate(self.labels):
+            digits[label] = digit
+        result = [ 0 ] * 81
+        cells = sudoku.cells
+        for index, source in enumerate(self._sources):
+            result[source] = DIGIT_TO_BIT[digits[BIT_TO_DIGIT[cells[index]]]]
+        return NativeSudoku.from_cells(result)
+
+def _relabel(
+        row:(int, ...), 
+        labels:[int, ...], 
+        used:int
+        ) -> "((int, ...), int)":
+    """Relabels new digits of row in order, returns the row and labels used"""
+    result = []
+    for digit in row:
+        if digit == 0:
+            result.append(_EMPTY)
+            continue
+        label = labels[digit]
+        if label == 0:
+            used += 1
+            label = labels[digit] = used
+        result.append(label)
+    return tuple(result), used
+
+def _search(
+        grid:((int, ...), ...), 
+        firsts:[int, ...], 
+        best:list
+        ):
+    """Finds the smallest row orders of grid and updates best
+    
+    Rows are chosen one at a time, keeping bands together and relabeling
+    digits as they come. Branches that are already worse than best are
+    dropped, and of rows giving the same branch only the first is tried.
+    best is [rows of the form, order of rows, labels] or [None, ...].
+    """
+    order = []
+    prefix = []
+    
+    def descend(level:int, labels:[int, ...], used:int):
+        if level == 9:
+            if best[0] is None or prefix < best[0]:
+                best[:] = [ list(prefix), list(order), labels ]
+            return
+        if level == 0:
+            sources = firsts
+        elif level % 3 == 0:
+            bands = set(row // 3 for row in order)
+            sources = [ row for row in range(9) if row // 3 not in bands ]
+        else:
+            band = order[-1] // 3 * 3
+            sources = [ row for row in range(band, band + 3)
+                if row not in order ]
+        options = []
+        seen = set()
+        for source in sources:
+            if level % 3 == 0:
+                band = source // 3 * 3
+                key = (grid[source], tuple(sorted(grid[band : band+3])))
+            else:
+                key = grid[source]
+            if key in seen:
+                continue
+            seen.add(key)
+            labels_ = labels[:]
+            row, used_ = _relabel(grid[source], labels_, used)
+            options.append((row, source, labels_, used_))
+        options.sort()
+        for row, source, labels_, used_ in options:
+            current = best[0] # Can change while searching the options
+            if current is not None and prefix == current[:level] and \
+                    row > current[level]:
+                break
+            prefix.append(row)
+            order.append(source)
+            descend(level + 1, labels_, used_)
+            prefix.pop()
+            order.pop()
+    
+    descend(0, [ 0 ] * 10, 0)
+
+def canonicalize(
+        sudoku:".sudoku.NativeSudoku"
+        ) -> "(.sudoku.NativeSudoku, Transform)":
+    """Returns the canonical form of a sudoku and the transform giving it
+    
+    Only the col orders putting the clues of the first row the most to the
+    left are searched, and rows are searched with pruning, so typical puzzles
+    need only a small part of the 3,359,232 transformations.
+    """
+    data = sudoku.to_bytes()
+    grids = (
+        tuple(tuple(data[row*9 : row*9+9]) for row in range(9)), 
+        tuple(tuple(data[col::9]) for col in range(9))
+    )
+    # Patterns of clues of all rows of both grids
+    candidates = []
+    for transpose, grid in enumerate(grids):
+        for row, values in enumerate(grid):
+            mask = 0
+            for col, digit in enumerate(values):
+                if digit:
+                    mask |= 1 << col
+            pattern, orders = _orders(mask)
+            candidates.append((pattern, transpose, row, orders))
+    pattern = min(candidates)[0]
+    # Col orders to search, rows that can be first with each
+    searches = {}
+    for pattern_, transpose, row, orders in candidates:
+        if pattern_ != pattern:
+            continue
+        grid = grids[transpose]
+        for cols in orders:
+            permuted = tuple(tuple(values[col] for col in cols)
+                for values in grid)
+            search = searches.get((transpose, permuted))
+            if search is None:
+                search = searches[(transpose, permuted)] = (cols, [])
+            search[1].append(row)
+    best = [ None, None, None ]
+    result = None
+    for (transpose, permuted), (cols, firsts) in searches.items():
+        previous = best[0]
+        _search(permuted, firsts, best)
+        if best[0] is not previous:
+            result = (transpose, list(best[1]), cols, best[2])
+    transpose, rows, cols, labels = result
+    used = max(labels)
+    for digit in range(1, 10): # Digits not in the sudoku keep their order
+        if labels[digit] == 0:
+            used += 1
+            labels[digit] = used
+    transform = Transform(bool(transpose), rows, cols, labels)
+    return transform.apply(sudoku), transform
+
+def canonical_form(sudoku:".sudoku.NativeSudoku") -> ".sudoku.NativeSudoku":
+    """Returns the canonical form of a sudoku"""
+    return canonicalize(sudoku)[0]
+
+def canonical_hash(sudoku:".sudoku.NativeSudoku") -> str:
+    """Returns a hash that is the same for all equivalent sudokus
+    
+    The hash is the hex BLAKE2b digest of 16 bytes of the canonical form as
+    returned by to_bytes, so it stays the same between runs and versions.
+    """
+    data = canonical_form(sudoku).to_bytes()
+    return blake2b(data, digest_size=16).hexdigest()
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+# 
+# Part of libsudoku library
+# Copyright (c) 2013, Tomi Leppänen
+# 
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from .register import Register
+from .solvers import Budget, SolvingError, collect_solutions
+from .topology import (
+    ALL_VALUES, BIT_TO_DIGIT, CELL_UNITS, DIGIT_TO_BIT, UNITS
+)
+
+class DancingLinks:
+    """Exact cover solver using Algorithm X with dancing links
+    
+    Links are kept in flat lists indexed by node. Node 0 is the root, nodes
+    1...columns are column headers and the rest are the 1s of the matrix.
+    Search covers and uncovers columns in place, nothing is copied while
+    backtracking.
+    """
+    __slots__ = ('left', 'right', 'up', 'down', 'column', 'size', 'row_of')
+    
+    def __init__(self, columns:int, rows:"[[int, ...], ...]"):
+        """Constructor, rows are lists of column numbers (0...columns-1)"""
+        headers = range(columns + 1)
+        self.left = [ header - 1 for header in headers ]
+        self.right = [ header + 1 for header in headers ]
+        self.left[0] = columns
+        self.right[columns] = 0
+        self.up = list(headers)
+        self.down = list(headers)
+        self.column = list(headers)
+        self.size = [ 0 for header in headers ]
+        self.row_of = [ -1 for header in headers ]
+        left, right, up, down = self.left, self.right, self.up, self.down
+        column, size, row_of = self.column, self.size, self.row_of
+        for row, columns_ in enumerate(rows):
+            first = len(column)
+            for col in columns_:
+                header = col + 1
+                node = len(column)
+                left.append(node - 1)
+                right.append(node + 1)
+                up.append(up[header])
+                down.append(header)
+                down[up[header]] = node
+                up[header] = node
+                column.append(header)
+                row_of.append(row)
+                size[header] += 1
+            left[first] = len(column) - 1
+            right[-1] = first
+    
+    def _cover(self, header:int):
+        left, right, up, down = self.left, self.right, self.up, self.down
+        column, size = self.column, self.size
+        right[left[header]] = right[header]
+        left[right[header]] = left[header]
+        i = down[header]
+        while i != header:
+            j = right[i]
+            while j != i:
+                down[up[j]] = down[j]
+                up[down[j]] = up[j]
+                size[column[j]] -= 1
+                j = right[j]
+            i = down[i]
+    
+    def _uncover(self, header:int):
+        left, right, up, down = self.left, self.right, self.up, self.down
+        column, size = self.column, self.size
+        i = up[header]
+        while i != header:
+            j = left[i]
+            while j != i:
+                size[column[j]] += 1
+                down[up[j]] = j
+                up[down[j]] = j
+                j = left[j]
+            i = up[i]
+        right[left[header]] = header
+        left[right[header]] = header
+    
+    def _choose(self) -> int:
+        """Returns the column header with the fewest nodes left"""
+        right, size = self.right, self.size
+        best = right[0]
+        best_size = size[best]
+        header = right[best]
+        while header != 0 and best_size > 1:
+            if size[header] < best_size:
+                best = header
+                best_size = size[header]
+            header = right[header]
+        return best
+    
+    def solutions(
+            self, 
+            stats:".stats.Stats"=None, 
+            budget:".solvers.Budget"=None
+            ) -> "generator: [int, ...]":
+        """Generator, yields exact covers as lists of row numbers
+        
+        With stats, counts rows tried (nodes) and backtracks from exhausted
+        columns in total and per search depth, and solutions. With budget,
+        raises BudgetExceeded when it runs out.
+        """
+        meter = None if budget is None else budget.start()
+        right, left, down = self.right, self.left, self.down
+        column, row_of = self.column, self.row_of
+        cover, uncover = self._cover, self._uncover
+        if right[0] == 0:
+            yield []
+            return
+        stack = []
+        header = self._choose()
+        cover(header)
+        stack.append(down[header])
+        while stack:
+            node = stack[-1]
+            header = column[node]
+            if node == header: # Column exhausted, backtrack
+                if stats is not None:
+                    stats.count('backtracks')
+                    stats.count_level(len(stack), 'backtracks')
+                uncover(header)
+                stack.pop()
+                if not stack:
+                    return
+                node = stack[-1]
+                j = left[node]
+                while j != node:
+                    uncover(column[j])
+                    j = left[j]
+                stack[-1] = down[node]
+                continue
+            if meter is not None:
+                meter.node()
+            if stats is not None:
+                stats.count('nodes')
+                stats.count_level(len(stack), 'nodes')
+            j = right[node]
+            while j != node:
+                cover(column[j])
+                j = right[j]
+            if right[0] == 0:
+                if meter is not None:
+                    meter.solution()
+                if stats is not None:
+                    stats.count('solutions')
+                yield [ row_of[node] for node in stack ]
+                j = left[node]
+                while j != node:
+                    uncover(column[j])
+                    j = left[j]
+                stack[-1] = down[node]
+                continue
+            header = self._choose()
+            cover(header)
+            stack.append(down[header])
+
+def sudoku_to_exact_cover(
+        sudoku:".sudoku.NativeSudoku"
+        ) -> "(int, [[int, ...], ...], [(int, int), ...])":
+    """Converts a sudoku to an exact cover problem
+    
+    Columns are the cells that are empty and the (unit, value) pairs that are
+    still missing. Returns the number of columns, the rows and (cell, value)
+    for each row.
+    """
+    cells = sudoku.cells
+    unit_maps = [ 0 ] * 27
+    for unit, indices in enumerate(UNITS):
+        for index in indices:
+            unit_maps[unit] |= cells[index]
+    numbers = {}
+    for index in range(81):
+        if cells[index] == 0:
+            numbers[index] = len(numbers)
+    for unit in range(27):
+        for digit in range(1, 10):
+            if not unit_maps[unit] & DIGIT_TO_BIT[digit]:
+                numbers[81 + unit*9 + digit] = len(numbers)
+    rows = []
+    choices = []
+    for index in range(81):
+        if cells[index] != 0:
+            continue
+        units = CELL_UNITS[index]
+        values = ALL_VALUES
+        for unit, position in units:
+            values &= ~unit_maps[unit]
+        while values:
+            value = values & -values
+            digit = BIT_TO_DIGIT[value]
+            rows.append([numbers[index]] + [ 
+                numbers[81 + unit*9 + digit] for unit, position in units 
+            ])
+            choices.append((index, value))
+            values ^= value
+    return len(numbers), rows, choices
+
+@Register.iterator(name='dlx')
+def iterate_dlx_solutions(
+        sudoku:".sudoku.NativeSudoku", 
+        stats:".stats.Stats"=None, 
+        budget:Budget=None
+        ) -> "generator: .sudoku.NativeSudoku":
+    """Generator, yields solutions as dancing links finds them
+    
+    With budget, raises BudgetExceeded when it runs out.
+    """
+    if not sudoku.is_valid():
+        raise SolvingError("Broken sudoku, didn't start solving", sudoku=sudoku)
+    if stats is None:
+        columns, rows, choices = sudoku_to_exact_cover(sudoku)
+        links = DancingLinks(columns, rows)
+    else:
+        columns, rows, choices = stats.run(
+            'exact_cover', sudoku_to_exact_cover, sudoku
+        )
+        links = stats.run('links', DancingLinks, columns, rows)
+    for solution in links.solutions(stats, budget):
+        solved = sudoku.copy()
+        cells = solved.cells
+        for row in solution:
+            index, value = choices[row]
+            cells[index] = value
+        yield solved
+
+@Register.solver(name='dlx')
+def dlx_solver(
+        sudoku:".sudoku.NativeSudoku", 
+        stats:".stats.Stats"=None, 
+        limit:int=None, 
+        budget:Budget=None
+        ) -> "[.sudoku.NativeSudoku, ...]":
+    """Solver that uses dancing links to find all or limit solutions
+    
+    BudgetExceeded has the solutions found before the budget ran out.
+    """
+    return collect_solutions(
+        iterate_dlx_solutions(sudoku, stats, budget), sudoku, limit
+    )
+
+def count_solutions(sudoku:".sudoku.NativeSudoku", limit:int=2) -> int:
+    """Counts solutions up to limit without building solved sudokus
+    
+    The search stops as soon as limit solutions are found, so the default
+    limit of 2 is enough to tell whether the solution is unique. With None
+    all solutions are counted. Broken sudokus have no solutions.
+    """
+    if not sudoku.is_valid():
+        return 0
+    columns, rows, choices = sudoku_to_exact_cover(sudoku)
+    count = 0
+    for solution in DancingLinks(columns, rows).solutions():
+        count += 1
+        if count == limit:
+            break
+    return count
+
+def is_unique(sudoku:".sudoku.NativeSudoku") -> bool:
+    """Returns whether the sudoku has exactly one solution"""
+    return count_solutions(sudoku) == 1
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# 
+# Part of libsudoku library
+# Copyright (c) 2013, Tomi Leppänen
+# 
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+
+"""Solver results encoded as plain data
+
+Results are (kind, payload) tuples of ints, bytes, strings, lists and
+tuples, so they can be pickled to worker processes, stored to a shelve
+database and compared. Sudokus are their 81 byte encodings. Errors are
+encoded with their message and, for BudgetExceeded, the reason, the
+solutions found, nodes and elapsed seconds.
+"""
+
+from .solvers import BudgetExceeded, SolvingError
+from .sudoku import NativeSudoku
+
+# Kinds of results
+ONE, MANY, ERROR, BUDGET = range(4)
+
+def encode(result:"what the solver returns or SolvingError") -> (int, object):
+    """Returns the encoded result of a solver or the SolvingError it raised"""
+    if isinstance(result, BudgetExceeded):
+        return BUDGET, (
+            str(result), result.reason, 
+            [ solved.to_bytes() for solved in result.solutions ], 
+            result.nodes, result.elapsed
+        )
+    if isinstance(result, SolvingError):
+        return ERROR, str(result)
+    if isinstance(result, list):
+        return MANY, [ solved.to_bytes() for solved in result ]
+    return ONE, result.to_bytes()
+
+def decode(
+        entry:(int, object), 
+        sudoku:".sudoku.NativeSudoku", 
+        revert:"function"=None
+        ) -> "what the solver returns or SolvingError":
+    """Returns the result of an encoded entry, errors are returned as well
+    
+    sudoku is given to the SolvingError. With revert, every decoded sudoku
+    is given to it and what it returns is used instead.
+    """
+    kind, payload = entry
+    if revert is None:
+        read = NativeSudoku.from_bytes
+    else:
+        def read(data:bytes) -> ".sudoku.NativeSudoku":
+            return revert(NativeSudoku.from_bytes(data))
+    if kind == ONE:
+        return read(payload)
+    if kind == MANY:
+        return [ read(data) for data in payload ]
+    if kind == BUDGET:
+        message, reason, solutions, nodes, elapsed = payload
+        return BudgetExceeded(
+            message, sudoku=sudoku, reason=reason, nodes=nodes, 
+            elapsed=elapsed, solutions=[ read(data) for data in solutions ]
+        )
+    return SolvingError(payload, sudoku=sudoku)
+
+def solve(
+        solver:"function", 
+        sudoku:".sudoku.NativeSudoku", 
+        **kwargs
+        ) -> (int, object):
+    """Calls solver with sudoku and kwargs, returns its encoded result"""
+    try:
+        return encode(solver(sudoku, **kwargs))
+    except SolvingError as error:
+        return encode(error)
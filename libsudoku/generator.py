@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# 
+# Part of libsudoku library
+# Copyright (c) 2013, Tomi Leppänen
+# 
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+import random
+from .batch import chunks, map_chunks
+from .dlx import DancingLinks, count_solutions, sudoku_to_exact_cover
+from .sudoku import NativeSudoku
+
+def _orbits(mirror:"function") -> ((int, ...), ...):
+    orbits = []
+    seen = set()
+    for index in range(81):
+        if index not in seen:
+            orbit = tuple(sorted({ index, mirror(index) }))
+            seen.update(orbit)
+            orbits.append(orbit)
+    return tuple(orbits)
+
+SYMMETRIES = {
+    'none': _orbits(lambda index: index), 
+    'rotational': _orbits(lambda index: 80 - index), 
+    'mirror': _orbits(lambda index: index - index % 9 + 8 - index % 9), 
+    'diagonal': _orbits(lambda index: index % 9 * 9 + index // 9), 
+}
+
+def random_grid(rng:random.Random=None) -> ".sudoku.NativeSudoku":
+    """Returns a random full grid
+    
+    The rows of the exact cover of an empty sudoku are shuffled before
+    searching, so the first solution found is a random one.
+    """
+    if rng is None:
+        rng = random.Random()
+    grid = NativeSudoku.from_cells([0] * 81)
+    columns, rows, choices = sudoku_to_exact_cover(grid)
+    order = list(range(len(rows)))
+    rng.shuffle(order)
+    links = DancingLinks(columns, [ rows[row] for row in order ])
+    cells = grid.cells
+    for row in next(links.solutions()):
+        index, value = choices[order[row]]
+        cells[index] = value
+    return grid
+
+def _is_unique_without(
+        puzzle:".sudoku.NativeSudoku", 
+        index:int, 
+        value:int
+        ) -> bool:
+    """Returns whether puzzle stays unique when the clue at index is removed
+    
+    The puzzle is unique before removing, so any other solution must have
+    another value at index. Only the rows for those values are searched,
+    which is much less work than counting all solutions.
+    """
+    cells = puzzle.cells
+    cells[index] = 0
+    try:
+        columns, rows, choices = sudoku_to_exact_cover(puzzle)
+    finally:
+        cells[index] = value
+    rows = [ row for row, choice in zip(rows, choices)
+        if choice != (index, value) ]
+    for solution in DancingLinks(columns, rows).solutions():
+        return False
+    return True
+
+def generate(
+        seed:"int, str or None"=None, 
+        symmetry:str='none', 
+        target:int=None, 
+        rng:random.Random=None
+        ) -> "(.sudoku.NativeSudoku, .sudoku.NativeSudoku)":
+    """Generates a puzzle with a unique solution, returns (puzzle, solution)
+    
+    Clues are removed in random order, symmetric groups of cells at a time,
+    and a removal is kept only if the puzzle still has one solution. Without
+    target the puzzle is minimal: no clue can be removed anymore. With target
+    removing stops at target clues, or the puzzle is minimal with more.
+    
+    The same seed always gives the same puzzle. symmetry is one of the keys
+    of SYMMETRIES.
+    """
+    if symmetry not in SYMMETRIES:
+        raise ValueError("Invalid symmetry {}".format(symmetry))
+    if rng is None:
+        rng = random.Random(seed)
+    solution = random_grid(rng)
+    puzzle = solution.copy()
+    cells = puzzle.cells
+    clues = 81
+    orbits = list(SYMMETRIES[symmetry])
+    rng.shuffle(orbits)
+    for orbit in orbits:
+        if target is not None and clues - len(orbit) < target:
+            continue
+        if len(orbit) == 1:
+            index = orbit[0]
+            if not _is_unique_without(puzzle, index, cells[index]):
+                continue
+            cells[index] = 0
+        else:
+            values = [ cells[index] for index in orbit ]
+            for index in orbit:
+                cells[index] = 0
+            if count_solutions(puzzle) != 1:
+                for index, value in zip(orbit, values):
+                    cells[index] = value
+                continue
+        clues -= len(orbit)
+        if clues == target:
+            break
+    return puzzle, solution
+
+def _generate_chunk(
+        seed:str, 
+        symmetry:str, 
+        target:"int or None", 
+        chunk:[int, ...]
+        ) -> [(bytes, bytes), ...]:
+    results = []
+    for number in chunk:
+        puzzle, solution = generate(
+            "{}:{}".format(seed, number), symmetry, target
+        )
+        results.append((puzzle.to_bytes(), solution.to_bytes()))
+    return results
+
+def generate_many(
+        count:int, 
+        seed:"int, str or None"=None, 
+        symmetry:str='none', 
+        target:int=None, 
+        workers:int=None, 
+        chunksize:int=16
+        ) -> "generator: (.sudoku.NativeSudoku, .sudoku.NativeSudoku)":
+    """Generator, generates count puzzles using a pool of worker processes
+    
+    Every puzzle has a seed of its own derived from seed, so the same seed
+    gives the same puzzles in the same order with any number of workers.
+    Puzzles are generated with batch.map_chunks, see it for workers. Yields
+    (puzzle, solution) tuples like generate.
+    """
+    if symmetry not in SYMMETRIES:
+        raise ValueError("Invalid symmetry {}".format(symmetry))
+    if seed is None:
+        seed = random.randrange(2**64)
+    results = map_chunks(
+        _generate_chunk, chunks(range(count), chunksize), 
+        (seed, symmetry, target), workers
+    )
+    for first, chunk, chunk_results in results:
+        for puzzle, solution in chunk_results:
+            yield (
+                NativeSudoku.from_bytes(puzzle), 
+                NativeSudoku.from_bytes(solution)
+            )
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# 
+# Part of libsudoku library
+# Copyright (c) 2013, Tomi Leppänen
+# 
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from .solvers import Map, SolvingError
+from .techniques import TECHNIQUES
+
+# Difficulty of every technique, techniques are tried in this order
+COSTS = {
+    'hidden_single': 1.5, 
+    'naked_single': 2.3, 
+    'locked_candidates': 2.8, 
+    'naked_pair': 3.0, 
+    'x_wing': 3.2, 
+    'hidden_pair': 3.4, 
+    'naked_triple': 3.6, 
+    'swordfish': 3.8, 
+    'hidden_triple': 4.0, 
+    'naked_quad': 5.0, 
+    'jellyfish': 5.2, 
+    'hidden_quad': 5.4, 
+}
+
+# Rating of sudokus that can't be solved without guessing
+GUESSING = 10.0
+
+class Grade:
+    """Difficulty of a sudoku
+    
+    rating is the cost of the most difficult technique needed, or GUESSING
+    if the techniques were not enough. techniques has the number of times
+    every needed technique made progress.
+    """
+    __slots__ = ('rating', 'solved', 'techniques')
+    
+    def __init__(self):
+        self.rating = 0.0
+        self.solved = False
+        self.techniques = {}
+    
+    def __repr__(self):
+        return "Grade(rating={}, solved={}, techniques={})".format(
+            self.rating, self.solved, self.techniques
+        )
+
+def grade(
+        sudoku:".sudoku.NativeSudoku", 
+        stats:".stats.Stats"=None
+        ) -> "Grade":
+    """Grades a sudoku by the techniques needed to solve it
+    
+    Techniques are applied on the candidates of one map in the order of
+    COSTS, starting again from the cheapest one after every one that made
+    progress, so every step uses the easiest technique available. The sudoku
+    is not changed.
+    
+    With stats, every technique applied is counted and timed by its name.
+    """
+    if not sudoku.is_valid():
+        raise SolvingError("Broken sudoku, didn't start grading", sudoku=sudoku)
+    sudoku = sudoku.copy()
+    map_ = Map(sudoku)
+    result = Grade()
+    techniques = [ (name, TECHNIQUES[name], cost)
+        for name, cost in COSTS.items() ]
+    while not map_.is_done():
+        for name, technique, cost in techniques:
+            if stats is None:
+                changed = technique(sudoku, map_)
+            else:
+                changed = stats.run(name, technique, sudoku, map_)
+            if changed:
+                result.techniques[name] = result.techniques.get(name, 0) + 1
+                result.rating = max(result.rating, cost)
+                break
+        else:
+            result.rating = GUESSING
+            return result
+    if not sudoku.is_valid():
+        raise SolvingError(
+            "Broken sudoku, checked after grading", sudoku=sudoku, map_=map_
+        )
+    result.solved = True
+    return result
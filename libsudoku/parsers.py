@@ -55,7 +55,6 @@ def table(value:str, separator:str=",") -> "sudoku as list":
 def ignoring_parser(value:str, *ignore) -> "sudoku as list":
     """Expects one character per cell, values other than [1-9] are empty"""
     chars = list(value)
-    chars = cleanup(chars)
     sudoku = []
     try:
         for r in range(9):
@@ -70,12 +69,83 @@ def ignoring_parser(value:str, *ignore) -> "sudoku as list":
         raise ParsingError("Not enough input")
     return sudoku
 
+# Translation table from characters to digits, all but 1-9 are empty (0)
+_DIGITS = bytes(
+    char - ord('0') if ord('1') <= char <= ord('9') else 0 
+    for char in range(256)
+)
+
+@Register.parser(name='native', native=True)
+def native_parser(
+        value:"str|bytes|memoryview", 
+        *ignore
+        ) -> "native sudoku":
+    """Expects one character per cell, values other than [1-9] are empty
+    
+    Parses straight to a native sudoku in one pass with a translation table.
+    """
+    if isinstance(value, str):
+        value = value.encode('latin-1', 'replace')
+    if len(value) < 81:
+        raise ParsingError("Not enough input", value=value)
+    return NativeSudoku.from_bytes(bytes(value[:81]).translate(_DIGITS))
+
+def parse_records(
+        buffer:"bytes|memoryview|mmap", 
+        record_size:int=82, 
+        block_size:int=4096
+        ) -> "generator: native sudoku":
+    """Generator, parses fixed width records of one character per cell
+    
+    Every record_size characters of buffer hold one sudoku in their first 81
+    characters, the rest of the record (a newline by default) is skipped.
+    Buffer is translated block_size records at a time.
+    """
+    if record_size < 81:
+        raise ValueError("Records must have at least 81 characters")
+    buffer = memoryview(buffer)
+    length = len(buffer)
+    block_length = record_size * block_size
+    for block_start in range(0, length, block_length):
+        block = bytes(
+            buffer[block_start : block_start + block_length]
+        ).translate(_DIGITS)
+        for start in range(0, len(block) - 80, record_size):
+            yield NativeSudoku.from_bytes(block[start : start+81])
+
 @Register.parser
 def table_ignore(value:str, *ignore) -> "sudoku as list":
     """Expects one character per cell, values other than [1-9] are empty"""
     sudoku = "".join(value.split("\n"))
     return ignoring_parser(sudoku)
 
+def read_lines(file_:"file or iterable of str") -> "generator: str":
+    """Generator, lazily reads one sudoku per line, skipping empty lines"""
+    for line in file_:
+        line = line.rstrip("\r\n")
+        if line:
+            yield line
+
+def parse_lines(
+        lines:"file or iterable of str", 
+        parser_name:str='ignore', 
+        *args
+        ) -> "generator: native sudoku or ParsingError":
+    """Generator, parses one sudoku per line with a registered parser
+    
+    Lines are read lazily, so any number of sudokus can be parsed in constant
+    memory. Yields ParsingError instead of a sudoku for lines that can't be
+    parsed.
+    """
+    parser = Register.get_parser(parser_name)
+    if parser is None:
+        raise ValueError("Invalid parser name {}".format(parser_name))
+    for line in read_lines(lines):
+        try:
+            yield parser(line, *args)
+        except ParsingError as error:
+            yield error
+
 def cleanup(values:list) -> "cleaned list":
     """Cleans up sudokus in parsers
 
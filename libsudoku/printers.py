@@ -15,40 +15,37 @@
 # 
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
+import sys
 from .register import Register
+from .topology import BIT_TO_DIGIT
+
+# Character for every native number, cells with many values show the highest
+_CHARACTERS = tuple(
+    str(BIT_TO_DIGIT[value] or value.bit_length()) for value in range(512)
+)
+_TABLE_CHARACTERS = (' ', ) + _CHARACTERS[1:]
+_TABLE_ROW = "{}{}{}\u2502{}{}{}\u2502{}{}{}\n"
+_TABLE_SEPARATOR = "\u253C".join(["\u2500"*3] * 3) + "\n"
+_TABLE = _TABLE_SEPARATOR.join([_TABLE_ROW * 3] * 3)
+_LIST = ",".join(["{}"] * 81) + "\n"
+
+def format_as_table(sudoku:'.sudoku.NativeSudoku') -> str:
+    """Returns the sudoku as a table"""
+    return _TABLE.format(*map(_TABLE_CHARACTERS.__getitem__, sudoku.cells))
+
+def format_as_list(sudoku:'.sudoku.NativeSudoku') -> str:
+    """Returns the sudoku as a list"""
+    return _LIST.format(*map(_CHARACTERS.__getitem__, sudoku.cells))
 
 @Register.printer(name='table')
-def print_as_table(sudoku:'.sudoku.NativeSudoku'):
-    """Prints the sudoku as a table"""
-    previous_row = 0
-    for value, row, col in sudoku.iterate_cells():
-        if row != previous_row:
-            print()
-            previous_row = row
-            if row in (3, 6):
-                for i in range(2):
-                    print("\u2500"*3, end="")
-                    print("\u253C", end="")
-                print("\u2500"*3)
-        if col in (3, 6):
-            print("\u2502", end="")
-        if value != 0:
-            print(convert_to_character(value), end="")
-        else:
-            print(" ", end="")
-    print()
+def print_as_table(sudoku:'.sudoku.NativeSudoku', file=None):
+    """Prints the sudoku as a table to file (default: stdout)"""
+    (sys.stdout if file is None else file).write(format_as_table(sudoku))
 
 @Register.printer(name='list')
-def print_as_list(sudoku:'.sudoku.NativeSudoku'):
-    """Prints the sudoku as a list"""
-    for value, row, col in sudoku.iterate_cells():
-        if value == 0:
-            value = ""
-        if row == 8 and col == 8:
-            print(convert_to_character(value), end="")
-        else:
-            print(convert_to_character(value), end=",")
-    print()
+def print_as_list(sudoku:'.sudoku.NativeSudoku', file=None):
+    """Prints the sudoku as a list to file (default: stdout)"""
+    (sys.stdout if file is None else file).write(format_as_list(sudoku))
 
 @Register.printer(name='none')
 def dummy_printer(*args, **kwargs):
@@ -65,10 +62,4 @@ def convert_to_character(value:int) -> str:
     >>> convert_to_character(0b000100000)
     '6'
     """
-    if value in (0, 1):
-        return str(value)
-    loops = 0
-    while(value):
-        value = value >> 1
-        loops += 1
-    return str(loops)
+    return _CHARACTERS[value]
@@ -15,22 +15,70 @@
 # 
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
+from importlib import import_module
 from types import FunctionType
 
+# Modules registering the parsers, solvers, iterators and printers of
+# libsudoku by name. Register imports a module only when one of its names is
+# asked for, so programs import only what they use.
+ENTRY_POINTS = {
+    'parsers': {
+        'list': 'parsers', 
+        'table': 'parsers', 
+        'ignore': 'parsers', 
+        'native': 'parsers', 
+        'table_ignore': 'parsers'
+    }, 
+    'solvers': {
+        'dummy': 'solvers', 
+        'simple': 'solvers', 
+        'split': 'solvers', 
+        'dlx': 'dlx', 
+        'logic': 'techniques', 
+        'logic_split': 'techniques', 
+        'bitboard': 'bitboard'
+    }, 
+    'iterators': {
+        'split': 'solvers', 
+        'dlx': 'dlx', 
+        'logic_split': 'techniques', 
+        'bitboard': 'bitboard'
+    }, 
+    'printers': {
+        'table': 'printers', 
+        'list': 'printers', 
+        'none': 'printers'
+    }
+}
+
 class Register:
     """libsudoku module register"""
     _parsers = {}
+    _native_parsers = set()
     _solvers = {}
+    _iterators = {}
     _printers = {}
     
     @classmethod
-    def parser(cls, parser:FunctionType=None, name:str=None) -> FunctionType:
-        """Decorator: Registers a parser function"""
-        if name is None:
+    def parser(
+            cls, 
+            parser:FunctionType=None, 
+            name:str=None, 
+            native:bool=False
+            ) -> FunctionType:
+        """Decorator: Registers a parser function
+        
+        Parsers return sudokus as lists of lists of integers, which get_parser
+        converts to native sudokus, unless native is True.
+        """
+        if name is None and not native:
             cls._parsers[parser.__name__] = parser
         else:
             def register(parser):
-                cls._parsers[name] = parser
+                name_ = parser.__name__ if name is None else name
+                cls._parsers[name_] = parser
+                if native:
+                    cls._native_parsers.add(name_)
                 return parser
             return register
         return parser
@@ -47,6 +95,25 @@ class Register:
             return register
         return solver
     
+    @classmethod
+    def iterator(
+            cls, 
+            iterator:FunctionType=None, 
+            name:str=None
+            ) -> FunctionType:
+        """Decorator: Registers a generator yielding solutions of a solver
+        
+        Iterators are registered by the name of the solver they belong to.
+        """
+        if name is None:
+            cls._iterators[iterator.__name__] = iterator
+        else:
+            def register(iterator):
+                cls._iterators[name] = iterator
+                return iterator
+            return register
+        return iterator
+    
     @classmethod
     def printer(cls, printer:FunctionType=None, name:str=None) -> FunctionType:
         """Decorator: Registers a printer function"""
@@ -59,13 +126,29 @@ class Register:
             return register
         return printer
     
+    @classmethod
+    def _load(cls, kind:str, name:str) -> "FunctionType|None":
+        """Returns a registered function, importing its module if needed"""
+        registered = getattr(cls, '_' + kind)
+        if name not in registered and name in ENTRY_POINTS[kind]:
+            import_module('.' + ENTRY_POINTS[kind][name], __package__)
+        return registered.get(name)
+    
+    @classmethod
+    def _names(cls, kind:str) -> [str, ...]:
+        """Returns names in ENTRY_POINTS and then other registered names"""
+        names = list(ENTRY_POINTS[kind])
+        names.extend(name for name in getattr(cls, '_' + kind)
+            if name not in ENTRY_POINTS[kind])
+        return names
+    
     @classmethod
     def get_parser(cls, name:str) -> "FunctionType|None":
         """Returns a parser function that fits the name or None"""
+        parser = cls._load('parsers', name)
+        if parser is None or name in cls._native_parsers:
+            return parser
         from .parsers import convert_to_native_sudoku
-        parser = cls._parsers.get(name)
-        if parser is None:
-            return None
         def _parser(*args, **kwargs):
             return convert_to_native_sudoku(parser(*args, **kwargs))
         return _parser
@@ -73,28 +156,39 @@ class Register:
     @classmethod
     def get_solver(cls, name:str) -> "FunctionType|None":
         """Returns a solver function that fits the name or None"""
-        return cls._solvers.get(name)
+        return cls._load('solvers', name)
+    
+    @classmethod
+    def get_iterator(cls, name:str) -> "FunctionType|None":
+        """Returns the solution generator of a solver or None"""
+        return cls._load('iterators', name)
     
     @classmethod
     def get_printer(cls, name:str) -> "FunctionType|None":
         """Returns a printer function that fits the name or None"""
-        return cls._printers.get(name)
+        return cls._load('printers', name)
     
     @classmethod
     def get_parsers(cls) -> "(str, ...)":
-        """Returns a tuple of parser function names"""
-        return list(cls._parsers.keys())
+        """Returns a tuple of parser function names without importing them"""
+        return cls._names('parsers')
     
     @classmethod
     def get_solvers(cls) -> "(str, ...)":
-        """Returns a tuple of solver function names"""
-        return list(cls._solvers.keys())
+        """Returns a tuple of solver function names without importing them"""
+        return cls._names('solvers')
     
     @classmethod
     def get_printers(cls) -> "(str, ...)":
-        """Returns a tuple of printer function names"""
-        return list(cls._printers.keys())
+        """Returns a tuple of printer function names without importing them"""
+        return cls._names('printers')
 
 def discover():
-    """Tries to find all parsers, solvers and printers in libsudoku"""
-    from . import parsers, solvers, printers
+    """Imports all modules in ENTRY_POINTS
+    
+    Lookups import modules as needed, this is for listing everything that
+    is registered.
+    """
+    for kind in ENTRY_POINTS.values():
+        for module in kind.values():
+            import_module('.' + module, __package__)
@@ -0,0 +1,529 @@
+#!/usr/bin/env python3
+# 
+# Part of libsudoku library
+# Copyright (c) 2013, Tomi Leppänen
+# 
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Solving service over a line protocol
+
+Every request is a line of JSON: {"id": ..., "sudoku": "..."} with optional
+"parser", "solver" and "limit". Every response is a line of JSON with the id
+of the request and "solutions", a list of sudokus as 81 digits, or "error".
+Responses are written as soon as they are ready, so they can come in a
+different order than the requests.
+
+Run with python3 -m libsudoku.service, see -h for options.
+"""
+
+import argparse
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+import json
+import os
+import sys
+from . import encoding
+from .batch import solve_chunk
+from .cache import SolutionCache
+from .parsers import ParsingError, native_parser
+from .register import Register, discover
+from .solvers import Budget, SolvingError
+from .stats import Stats
+
+# Translation table from digits to characters
+_CHARACTERS = bytes(ord('0') + byte if byte < 10 else 0 for byte in range(256))
+
+def _to_text(data:bytes) -> str:
+    return data.translate(_CHARACTERS).decode()
+
+class SolvingService:
+    """Service solving sudokus in a warm pool of worker processes
+    
+    While workers are busy, requests arriving within delay seconds of each
+    other are solved together in batches of up to batch_size sudokus, so
+    workers get enough work per call. At most two batches per worker are
+    solved at a time and at most max_pending requests are accepted at a time,
+    after that no more requests are read from connections. workers is as
+    for batch.map_chunks, except that with 0 batches are solved in a thread.
+    
+    Results are kept in cache, shared by all requests, and requests for a
+    sudoku that is being solved wait for the same result. Requests get
+    timeout seconds to be solved, None meaning no limit. budget is given to
+    the solver for every sudoku, by default a time budget of timeout, so a
+    sudoku that takes too long can't keep a worker busy. Results of sudokus
+    going over the budget aren't cached.
+    
+    Requests, batches, requests in them, requests waiting for the result of
+    another, errors, timeouts and unexpected failures are counted to stats.
+    """
+    def __init__(
+            self, 
+            solver:str='dlx', 
+            workers:int=None, 
+            batch_size:int=64, 
+            delay:float=0.002, 
+            timeout:float=10.0, 
+            max_pending:int=1024, 
+            cache:".cache.SolutionCache"=None, 
+            budget:".solvers.Budget"=None
+            ):
+        if Register.get_solver(solver) is None:
+            raise ValueError("Invalid solver name {}".format(solver))
+        self.solver = solver
+        if workers is None:
+            workers = os.cpu_count() or 1
+        self.workers = workers
+        self.batch_size = batch_size
+        self.delay = delay
+        self.timeout = timeout
+        self.max_pending = max_pending
+        self.cache = SolutionCache() if cache is None else cache
+        if budget is None and timeout is not None:
+            budget = Budget(time=timeout)
+        self.budget = budget
+        self.stats = Stats()
+        self._executor = None
+        self._queue = None
+        self._batcher = None
+        self._slots = None
+        self._accepting = None
+        self._solving = {} # Futures of results being solved by key
+        self._in_flight = 0 # Batches being solved
+    
+    async def __aenter__(self) -> "SolvingService":
+        await self.start()
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.close()
+    
+    async def start(self):
+        """Starts the worker processes and batching"""
+        if self.workers:
+            self._executor = ProcessPoolExecutor(
+                self.workers, initializer=discover
+            )
+        self._queue = asyncio.Queue(self.max_pending)
+        self._slots = asyncio.Semaphore(max(self.workers, 1)*2)
+        self._accepting = asyncio.Semaphore(self.max_pending)
+        self._batcher = asyncio.get_running_loop().create_task(self._batch())
+    
+    async def close(self):
+        """Stops batching and the worker processes"""
+        if self._batcher is not None:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+            self._batcher = None
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+        self.cache.close()
+    
+    async def _batch(self):
+        """Collects requests to batches and starts solving them"""
+        loop = asyncio.get_running_loop()
+        while True:
+            requests = [ await self._queue.get() ]
+            # Waiting for more requests helps only when workers are busy
+            deadline = loop.time() + (self.delay if self._in_flight else 0)
+            while len(requests) < self.batch_size:
+                if self._queue.empty():
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        requests.append(await asyncio.wait_for(
+                            self._queue.get(), remaining
+                        ))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    requests.append(self._queue.get_nowait())
+            groups = {} # Requests by solver and limit
+            for request in requests:
+                groups.setdefault(request[:2], []).append(request)
+            for (solver, limit), group in groups.items():
+                await self._slots.acquire()
+                loop.create_task(self._dispatch(solver, limit, group))
+    
+    def _fail(
+            self, 
+            requests:[(str, "int or None", bytes, bytes), ...], 
+            error:Exception
+            ):
+        """Sets error as the result of requests that have no result yet"""
+        for request in requests:
+            future = self._solving.pop(request[2], None)
+            if future is not None and not future.done():
+                future.set_exception(error)
+    
+    async def _dispatch(
+            self, 
+            solver:str, 
+            limit:"int or None", 
+            requests:[(str, "int or None", bytes, bytes), ...]
+            ):
+        """Solves a batch in a worker and sets the results of its requests"""
+        self.stats.count('batches')
+        self.stats.count('batched', len(requests))
+        self._in_flight += 1
+        try:
+            results = await asyncio.get_running_loop().run_in_executor(
+                self._executor, solve_chunk, solver, False, limit, 
+                self.budget, [ data for solver, limit, key, data in requests ]
+            )
+            for request, (kind, payload, stats) in zip(requests, results):
+                key = request[2]
+                entry = (kind, payload)
+                self._solving.pop(key).set_result(entry)
+                if kind != encoding.BUDGET:
+                    self.cache.put(key, entry)
+        except Exception as error:
+            self._fail(requests, error)
+        finally:
+            self._in_flight -= 1
+            self._slots.release()
+    
+    async def solve(
+            self, 
+            sudoku:".sudoku.NativeSudoku", 
+            solver:str=None, 
+            limit:int=None, 
+            timeout:float=None
+            ) -> "what the solver returns":
+        """Solves a sudoku in the workers or returns a cached result
+        
+        solver and timeout default to those of the service, limit must be
+        None or a positive int. Raises the SolvingError of the solver, or
+        TimeoutError if the result isn't ready in time.
+        """
+        if self._queue is None:
+            raise RuntimeError("Service is not started")
+        if limit is not None and (
+                not isinstance(limit, int) or isinstance(limit, bool) or
+                limit < 1):
+            raise ValueError("Invalid limit {!r}".format(limit))
+        if solver is None:
+            solver = self.solver
+        elif Register.get_solver(solver) is None:
+            raise ValueError("Invalid solver name {}".format(solver))
+        if timeout is None:
+            timeout = self.timeout
+        self.stats.count('requests')
+        key, form, transform = self.cache.key(sudoku, solver, limit)
+        entry = self.cache.lookup(key)
+        if entry is None:
+            future = self._solving.get(key)
+            if future is not None:
+                self.stats.count('coalesced')
+            else:
+                future = asyncio.get_running_loop().create_future()
+                self._solving[key] = future
+                try:
+                    await self._queue.put(
+                        (solver, limit, key, form.to_bytes())
+                    )
+                except BaseException: # Cancelled while waiting for room
+                    del self._solving[key]
+                    future.cancel()
+                    raise
+            try:
+                entry = await asyncio.wait_for(asyncio.shield(future), timeout)
+            except asyncio.TimeoutError:
+                self.stats.count('timeouts')
+                raise TimeoutError("Sudoku wasn't solved in time") from None
+        if entry[0] in (encoding.ERROR, encoding.BUDGET):
+            self.stats.count('errors')
+        return self.cache.result(entry, sudoku, transform)
+    
+    async def _respond(
+            self, 
+            request:dict, 
+            writer:"asyncio.StreamWriter"
+            ):
+        """Answers a request of the line protocol"""
+        response = { 'id': request.get('id') }
+        try:
+            await self._answer(request, response)
+        finally:
+            self._accepting.release()
+        writer.write(json.dumps(response).encode() + b'\n')
+        await writer.drain()
+    
+    async def _answer(self, request:dict, response:dict):
+        """Sets solutions or error of a request to response
+        
+        Any error is answered, so one bad request can't leave its client
+        waiting.
+        """
+        try:
+            if 'sudoku' not in request:
+                raise ValueError("Request has no sudoku")
+            for name in ('sudoku', 'parser', 'solver'):
+                if request.get(name) is not None and \
+                        not isinstance(request[name], str):
+                    raise ValueError("{} must be a string".format(name))
+            parser_name = request.get('parser', 'native')
+            parser = Register.get_parser(parser_name)
+            if parser is None:
+                raise ValueError("Invalid parser name {}".format(parser_name))
+            sudoku = parser(request['sudoku'])
+            result = await self.solve(
+                sudoku, request.get('solver'), request.get('limit')
+            )
+        except (ParsingError, SolvingError, TimeoutError, ValueError) as error:
+            response['error'] = str(error)
+        except Exception as error:
+            self.stats.count('failures')
+            response['error'] = "Failed to solve: {}".format(error)
+        else:
+            if not isinstance(result, list):
+                result = [ result ]
+            response['solutions'] = [ _to_text(solved.to_bytes())
+                for solved in result ]
+    
+    async def handle(
+            self, 
+            reader:"asyncio.StreamReader", 
+            writer:"asyncio.StreamWriter"
+            ):
+        """Answers requests of the line protocol until reader ends
+        
+        Requests are answered concurrently, but at most max_pending of them
+        at a time, the next line is read only when one is answered.
+        """
+        tasks = set()
+        loop = asyncio.get_running_loop()
+        try:
+            async for line in reader:
+                if not line.strip():
+                    continue
+                try:
+                    request = json.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("Request is not an object")
+                except ValueError as error:
+                    self.stats.count('invalid')
+                    writer.write(json.dumps({
+                        'id': None, 'error': "Invalid request: {}".format(error)
+                    }).encode() + b'\n')
+                    await writer.drain()
+                    continue
+                await self._accepting.acquire()
+                task = loop.create_task(self._respond(request, writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        except asyncio.CancelledError: # Service is shutting down
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+    
+    async def serve(self, host:str='127.0.0.1', port:int=0) -> "Server":
+        """Starts answering connections on a TCP socket, returns the server"""
+        return await asyncio.start_server(self.handle, host, port)
+    
+    async def serve_unix(self, path:str) -> "Server":
+        """Starts answering connections on a Unix socket, returns the server"""
+        return await asyncio.start_unix_server(self.handle, path)
+    
+    async def serve_stdio(self):
+        """Answers requests from stdin to stdout until stdin ends
+        
+        Stdin is read in a thread, so it can be a file as well as a pipe.
+        """
+        loop = asyncio.get_running_loop()
+        reader = asyncio.StreamReader()
+        def read():
+            for line in sys.stdin.buffer:
+                loop.call_soon_threadsafe(reader.feed_data, line)
+            loop.call_soon_threadsafe(reader.feed_eof)
+        reading = loop.run_in_executor(None, read)
+        await self.handle(reader, _FileWriter(sys.stdout.buffer))
+        await reading
+
+class _FileWriter:
+    """Writer of a binary file for handle in place of a stream writer"""
+    def __init__(self, file_:"binary file"):
+        self._file = file_
+    
+    def write(self, data:bytes):
+        self._file.write(data)
+        self._file.flush()
+    
+    async def drain(self):
+        pass
+    
+    def close(self):
+        self._file.flush()
+
+class Client:
+    """Client of the line protocol
+    
+    Requests can be made concurrently from many tasks, responses are matched
+    to requests by their id.
+    """
+    def __init__(
+            self, 
+            reader:"asyncio.StreamReader", 
+            writer:"asyncio.StreamWriter"
+            ):
+        self._reader = reader
+        self._writer = writer
+        self._next_id = 0
+        self._waiting = {}
+        self._receiver = asyncio.get_running_loop().create_task(
+            self._receive()
+        )
+    
+    @classmethod
+    async def connect(cls, host:str, port:int) -> "Client":
+        """Returns a client connected to a TCP socket"""
+        return cls(*await asyncio.open_connection(host, port))
+    
+    @classmethod
+    async def connect_unix(cls, path:str) -> "Client":
+        """Returns a client connected to a Unix socket"""
+        return cls(*await asyncio.open_unix_connection(path))
+    
+    async def __aenter__(self) -> "Client":
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self.close()
+    
+    async def _receive(self):
+        try:
+            async for line in self._reader:
+                response = json.loads(line)
+                future = self._waiting.pop(response['id'], None)
+                if future is not None and not future.done():
+                    future.set_result(response)
+        finally:
+            for future in self._waiting.values():
+                if not future.done():
+                    future.set_exception(ConnectionError("Connection closed"))
+    
+    async def close(self):
+        self._writer.close()
+        await self._writer.wait_closed()
+        self._receiver.cancel()
+    
+    async def request(self, **request) -> dict:
+        """Sends a request and returns the response as a dict"""
+        self._next_id += 1
+        request['id'] = self._next_id
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[self._next_id] = future
+        self._writer.write(json.dumps(request).encode() + b'\n')
+        await self._writer.drain()
+        return await future
+    
+    async def solve(
+            self, 
+            sudoku:".sudoku.NativeSudoku", 
+            solver:str=None, 
+            limit:int=None
+            ) -> "[.sudoku.NativeSudoku, ...]":
+        """Returns solutions of a sudoku, raises SolvingError on errors"""
+        request = { 'sudoku': _to_text(sudoku.to_bytes()) }
+        if solver is not None:
+            request['solver'] = solver
+        if limit is not None:
+            request['limit'] = limit
+        response = await self.request(**request)
+        if 'error' in response:
+            raise SolvingError(response['error'], sudoku=sudoku)
+        return [ native_parser(solved) for solved in response['solutions'] ]
+
+def parse_arguments(*args) -> "Namespace":
+    parser = argparse.ArgumentParser(
+        description="Answers requests to solve sudokus, one JSON per line"
+    )
+    parser.add_argument(
+        '--host', 
+        default='127.0.0.1', 
+        help="Host to listen on (default: %(default)s)"
+    )
+    parser.add_argument(
+        '--port', 
+        type=int, 
+        default=8081, 
+        help="Port to listen on (default: %(default)s)"
+    )
+    parser.add_argument(
+        '--unix', 
+        metavar='PATH', 
+        help="Listen on a Unix socket instead"
+    )
+    parser.add_argument(
+        '--stdio', 
+        action='store_true', 
+        help="Answer requests from stdin instead"
+    )
+    parser.add_argument(
+        '-s', '--solver', 
+        default='dlx', 
+        help="Default solver (default: %(default)s)"
+    )
+    parser.add_argument(
+        '-j', '--jobs', 
+        type=int, 
+        default=None, 
+        help="Number of worker processes (default: number of CPUs)"
+    )
+    parser.add_argument(
+        '-t', '--timeout', 
+        type=float, 
+        default=10.0, 
+        help="Seconds to solve a request (default: %(default)s)"
+    )
+    parser.add_argument(
+        '-b', '--batch-size', 
+        type=int, 
+        default=64, 
+        help="Most requests solved in one batch (default: %(default)s)"
+    )
+    return parser.parse_args(args if args else None)
+
+async def run(args:"Namespace"):
+    service = SolvingService(
+        args.solver, args.jobs, args.batch_size, timeout=args.timeout
+    )
+    async with service:
+        if args.stdio:
+            await service.serve_stdio()
+            return
+        if args.unix:
+            server = await service.serve_unix(args.unix)
+        else:
+            server = await service.serve(args.host, args.port)
+        async with server:
+            await server.serve_forever()
+
+def main(*args) -> int:
+    try:
+        asyncio.run(run(parse_arguments(*args)))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -17,9 +17,12 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from array import array
-from copy import deepcopy
+from time import monotonic
 from .register import Register
-from .sudoku import NATIVE_NUMBERS
+from .topology import (
+    ALL_VALUES, BIT_COUNT, BIT_TO_DIGIT, CELL_COL, CELL_ROW, CELL_UNITS, 
+    PEERS, UNITS
+)
 
 class SolvingError(Exception):
     """Exception for solving errors"""
@@ -30,36 +33,169 @@ class SolvingError(Exception):
         self.solver = solver
         super().__init__(*args)
 
+class BudgetExceeded(SolvingError):
+    """Exception for searches going over their budget
+    
+    reason is the name of the limit that was exceeded: time, nodes or
+    solutions. solutions are the solutions found before that, and nodes and
+    elapsed (seconds) tell how far the search got. Stats given to the solver
+    have what was counted until then.
+    """
+    
+    def __init__(
+            self, 
+            *args, 
+            reason:str=None, 
+            solutions:list=(), 
+            nodes:int=0, 
+            elapsed:float=0.0, 
+            **kwargs
+            ):
+        self.reason = reason
+        self.solutions = list(solutions)
+        self.nodes = nodes
+        self.elapsed = elapsed
+        super().__init__(*args, **kwargs)
+
+class Budget:
+    """Limits for a search, None meaning no limit
+    
+    time is seconds of wall clock, nodes is search nodes and solutions is
+    solutions found, going over any of them raises BudgetExceeded. The same
+    budget can be given to any number of searches, each gets all of it.
+    """
+    __slots__ = ('time', 'nodes', 'solutions')
+    
+    def __init__(self, time:float=None, nodes:int=None, solutions:int=None):
+        self.time = time
+        self.nodes = nodes
+        self.solutions = solutions
+    
+    def __repr__(self):
+        return "Budget(time={}, nodes={}, solutions={})".format(
+            self.time, self.nodes, self.solutions
+        )
+    
+    def start(self) -> "Meter":
+        """Returns a meter of a search starting now"""
+        return Meter(self)
+
+class Meter:
+    """Spending of a budget by a search
+    
+    Searches call node before every node and solution before yielding every
+    solution, so nodes and solutions are those that were within the budget.
+    """
+    __slots__ = ('nodes', 'solutions', 'started', '_nodes', '_solutions', 
+        '_deadline')
+    
+    def __init__(self, budget:Budget):
+        self.nodes = 0
+        self.solutions = 0
+        self.started = monotonic()
+        self._nodes = budget.nodes
+        self._solutions = budget.solutions
+        if budget.time is None:
+            self._deadline = None
+        else:
+            self._deadline = self.started + budget.time
+    
+    def exceeded(self, reason:str):
+        raise BudgetExceeded(
+            "Budget exceeded: {}".format(reason), reason=reason, 
+            nodes=self.nodes, elapsed=monotonic() - self.started
+        )
+    
+    def node(self):
+        if self.nodes == self._nodes:
+            self.exceeded('nodes')
+        if self._deadline is not None and monotonic() > self._deadline:
+            self.exceeded('time')
+        self.nodes += 1
+    
+    def solution(self):
+        if self.solutions == self._solutions:
+            self.exceeded('solutions')
+        self.solutions += 1
+
 class Map:
+    """Map of possible values
+    
+    Besides the value maps of rows, cols and boxes the map keeps the
+    possible values of every cell and, for every unit and value, a bit mask
+    of the positions in the unit where the value can still go. Both are
+    updated incrementally when a value is placed.
+    
+    Every change is recorded to a trail, so that changes made after mark()
+    can be reverted with undo().
+    """
     def __init__(self, sudoku:'.sudoku.NativeSudoku'):
         self.sudoku = sudoku
+        self.trail = []
+        cells = sudoku.cells
+        self.unit_maps = array('H', [0]) * 27
+        for unit, indices in enumerate(UNITS):
+            for index in indices:
+                self.unit_maps[unit] |= cells[index]
+        unit_maps = memoryview(self.unit_maps)
+        self.row_maps = unit_maps[0:9]
+        self.col_maps = unit_maps[9:18]
+        self.box_maps = [ unit_maps[base : base+3] for base in (18, 21, 24) ]
         
-        self.row_maps = array('I')
-        for row in range(9):
-            self.row_maps.append(0)
-            for value, col in sudoku.iterate_row(row):
-                self.row_maps[row] |= value
+        self.candidates = array('H', [0]) * 81
+        self.positions = array('H', [0]) * 243
+        for index, units in enumerate(CELL_UNITS):
+            if cells[index] != 0:
+                continue
+            values = ALL_VALUES
+            for unit, position in units:
+                values &= ~self.unit_maps[unit]
+            self.candidates[index] = values
+            while values:
+                value = values & -values
+                digit = BIT_TO_DIGIT[value] - 1
+                for unit, position in units:
+                    self.positions[unit*9 + digit] |= 1 << position
+                values ^= value
+    
+    def eliminate(self, index:int, values:int):
+        """Removes values from possible values of the cell at index
         
-        self.col_maps = array('I')
-        for col in range(9):
-            self.col_maps.append(0)
-            for value, row in sudoku.iterate_col(col):
-                self.col_maps[col] |= value
+        The change goes to the trail like placed values, so undo() reverts
+        it. Techniques remove candidates only through this.
+        """
+        values &= self.candidates[index]
+        if not values:
+            return
+        self.candidates[index] ^= values
+        self.trail.append(index)
+        self.trail.append(values)
+        positions = self.positions
+        units = CELL_UNITS[index]
+        while values:
+            value = values & -values
+            digit = BIT_TO_DIGIT[value] - 1
+            for unit, position in units:
+                positions[unit*9 + digit] &= ~(1 << position)
+            values ^= value
+    
+    def get_positions(self, unit:int, value:int) -> int:
+        """Returns a bit mask of positions in a unit where value is possible
         
-        self.box_maps = [ [], [], [] ]
-        for y in range(3):
-            for x in range(3):
-                self.box_maps[y].append(0)
-                for value, row, col in sudoku.iterate_box(y, x):
-                    self.box_maps[y][x] |= value
+        Units 0-8 are rows, 9-17 cols and 18-26 boxes. Bit n is set if the
+        value is possible in the nth cell of the unit.
+        """
+        return self.positions[unit*9 + BIT_TO_DIGIT[value] - 1]
     
     def get_values(self, row:int, col:int) -> int:
         """Returns all possible values for a cell"""
-        value = 0b1000000000
-        value |= self.row_maps[row]
-        value |= self.col_maps[col]
-        value |= self.box_maps[row//3][col//3]
-        return ~value & 0b111111111
+        index = row*9 + col
+        if self.sudoku.cells[index] == 0:
+            return self.candidates[index]
+        values = ALL_VALUES
+        for unit, position in CELL_UNITS[index]:
+            values &= ~self.unit_maps[unit]
+        return values
     
     def get_value_map(self) -> [array, array, array]:
         """Returns a map of possible values"""
@@ -75,106 +211,267 @@ class Map:
     
     def is_done(self) -> bool:
         """Returns whether the sudoku this map represents is done"""
-        for map_ in self.row_maps:
-            if not map_ == 0b111111111:
+        for map_ in self.unit_maps:
+            if not map_ == ALL_VALUES:
                 return False
-        for map_ in self.col_maps:
-            if not map_ == 0b111111111:
-                return False
-        for maps in self.box_maps:
-            for map_ in maps:
-                if not map_ == 0b111111111:
-                    return False
         return True
     
+    def mark(self) -> int:
+        """Returns a mark of current state to be given to undo"""
+        return len(self.trail)
+    
+    def place(self, index:int, value:int):
+        """Sets value to the cell at index and updates all maps"""
+        self.sudoku.cells[index] = value
+        self.update(CELL_ROW[index], CELL_COL[index], value)
+    
+    def undo(self, mark:int):
+        """Reverts changes made after mark, including values set to cells"""
+        trail = self.trail
+        candidates = self.candidates
+        positions = self.positions
+        cells = self.sudoku.cells
+        while len(trail) > mark:
+            values = trail.pop()
+            index = trail.pop()
+            if index < 0: # Placed value
+                index = ~index
+                cells[index] = 0
+                for unit, position in CELL_UNITS[index]:
+                    self.unit_maps[unit] &= ~values
+                continue
+            candidates[index] |= values
+            units = CELL_UNITS[index]
+            while values:
+                value = values & -values
+                digit = BIT_TO_DIGIT[value] - 1
+                for unit, position in units:
+                    positions[unit*9 + digit] |= 1 << position
+                values ^= value
+    
     def update(self, row:int, col:int, value:int):
         """Updates all maps by given values"""
-        self.row_maps[row] |= value
-        self.col_maps[col] |= value
-        self.box_maps[row//3][col//3] |= value
+        index = row*9 + col
+        for unit, position in CELL_UNITS[index]:
+            self.unit_maps[unit] |= value
+        self.trail.append(~index)
+        self.trail.append(value)
+        self.eliminate(index, ALL_VALUES)
+        candidates = self.candidates
+        for peer in PEERS[index]:
+            if candidates[peer] & value:
+                self.eliminate(peer, value)
 
 @Register.solver(name='dummy')
-def dummy_solver(sudoku:".sudoku.NativeSudoku") -> ".sudoku.NativeSudoku":
+def dummy_solver(
+        sudoku:".sudoku.NativeSudoku", 
+        stats:".stats.Stats"=None, 
+        limit:int=None, 
+        budget:Budget=None
+        ) -> ".sudoku.NativeSudoku":
     """Solver that creates a map but doesn't solve anything"""
-    Map(sudoku)
+    if stats is None:
+        Map(sudoku)
+    else:
+        stats.run('map', Map, sudoku)
     return sudoku
 
 @Register.solver(name='simple')
-def simple_solver(sudoku:".sudoku.NativeSudoku") -> ".sudoku.NativeSudoku":
-    """Very primitive solver"""
+def simple_solver(
+        sudoku:".sudoku.NativeSudoku", 
+        stats:".stats.Stats"=None, 
+        techniques:"(function, ...)"=(), 
+        limit:int=None, 
+        budget:Budget=None
+        ) -> ".sudoku.NativeSudoku":
+    """Very primitive solver
+    
+    Fills in singles and, when they run out, applies techniques in order
+    (see propagate). Finds one solution at most without searching, so limit
+    and budget are ignored.
+    """
     if not sudoku.is_valid():
         raise SolvingError("Broken sudoku, didn't start solving", sudoku=sudoku)
     map_ = Map(sudoku)
-    while True:
-        if check_lines_boxes(sudoku, map_):
-            continue
-        elif check_all_cells(sudoku, map_):
-            continue
-        elif not map_.is_done():
-            raise SolvingError(
-                "Can't solve", sudoku=sudoku, map_=map_, solver=simple_solver
-            )
-        else:
-            break
+    propagate(sudoku, map_, stats, techniques)
+    if not map_.is_done():
+        raise SolvingError(
+            "Can't solve", sudoku=sudoku, map_=map_, solver=simple_solver
+        )
     if not sudoku.is_valid():
         raise SolvingError(
             "Broken sudoku, checked after solving", sudoku=sudoku, map_=map_
         )
     return sudoku
 
+def collect_solutions(
+        solutions:"iterable of .sudoku.NativeSudoku", 
+        sudoku:".sudoku.NativeSudoku", 
+        limit:int=None
+        ) -> "[.sudoku.NativeSudoku, ...]":
+    """Returns all or limit solutions of sudoku from a search
+    
+    BudgetExceeded raised by the search gets the solutions found before the
+    budget ran out, and SolvingError is raised if there are no solutions.
+    """
+    ready = []
+    try:
+        for solved in solutions:
+            ready.append(solved)
+            if len(ready) == limit:
+                break
+    except BudgetExceeded as error:
+        error.solutions = ready
+        error.sudoku = sudoku
+        raise
+    if not ready:
+        raise SolvingError("Sudoku has no solutions", sudoku=sudoku)
+    return ready
+
 @Register.solver(name='split')
 def splitting_solver(
-        sudoku:".sudoku.NativeSudoku"
+        sudoku:".sudoku.NativeSudoku", 
+        stats:".stats.Stats"=None, 
+        techniques:"(function, ...)"=(), 
+        limit:int=None, 
+        budget:Budget=None
         ) -> "[.sudoku.NativeSudoku, ....]":
-    """Solver that uses split to complete all sudokus"""
+    """Solver that uses split to complete all or limit sudokus
+    
+    See iterate_solutions for the search. BudgetExceeded has the solutions
+    found before the budget ran out.
+    """
+    return collect_solutions(
+        iterate_solutions(sudoku, stats, techniques, budget), sudoku, limit
+    )
+
+@Register.iterator(name='split')
+def iterate_solutions(
+        sudoku:".sudoku.NativeSudoku", 
+        stats:".stats.Stats"=None, 
+        techniques:"(function, ...)"=(), 
+        budget:Budget=None
+        ) -> "generator: .sudoku.NativeSudoku":
+    """Generator, yields solutions as the split search finds them
+    
+    Search is depth first. Singles are filled in first, with techniques when
+    they run out (see propagate), and then the empty cell with the fewest
+    possible values is split. Changes are undone from the trail of the map
+    when backtracking, so only the branch being searched is kept in memory,
+    and the search stops when the generator is closed.
+    
+    With stats, counts nodes, branches, dead ends and solutions in total and
+    per search depth. With budget, raises BudgetExceeded when it runs out.
+    """
     if not sudoku.is_valid():
         raise SolvingError("Broken sudoku, didn't start solving", sudoku=sudoku)
-    sudokus_and_maps = [(sudoku, Map(sudoku))]
-    ready = []
+    meter = None if budget is None else budget.start()
+    sudoku = sudoku.copy()
+    map_ = Map(sudoku)
+    branches = [] # (mark, index, values not yet tried)
     while True:
+        if meter is not None:
+            meter.node()
+        if stats is not None:
+            stats.count('nodes')
+            stats.count_level(len(branches), 'nodes')
         try:
-            sudoku, map_ = sudokus_and_maps.pop()
-        except IndexError: # The list is empty
-            break
-        try:
-            if check_lines_boxes(sudoku, map_):
-                sudokus_and_maps.append((sudoku, map_))
+            propagate(sudoku, map_, stats, techniques)
+            if not map_.is_done():
+                index = choose_cell(sudoku, map_)
+                values = map_.candidates[index]
+                value = values & -values
+                if stats is not None:
+                    stats.count('branches')
+                    stats.count_level(len(branches), 'branches')
+                branches.append((map_.mark(), index, values ^ value))
+                map_.place(index, value)
                 continue
-            elif check_all_cells(sudoku, map_):
-                sudokus_and_maps.append((sudoku, map_))
-                continue
-        except SolvingError:
-            continue
-        if map_.is_done():
             if sudoku.is_valid():
-                ready.append(sudoku)
+                if meter is not None:
+                    meter.solution()
+                if stats is not None:
+                    stats.count('solutions')
+                yield sudoku.copy()
+        except BudgetExceeded:
+            raise
+        except SolvingError:
+            if stats is not None:
+                stats.count('dead_ends')
+                stats.count_level(len(branches), 'dead_ends')
+        # Backtrack to the latest branch with values left to try
+        while branches:
+            mark, index, values = branches.pop()
+            map_.undo(mark)
+            if values:
+                value = values & -values
+                if stats is not None:
+                    stats.count('branches')
+                    stats.count_level(len(branches), 'branches')
+                branches.append((mark, index, values ^ value))
+                map_.place(index, value)
+                break
         else:
-            sudokus_and_maps.extend(split(sudoku, map_))
-    if not ready:
-        raise SolvingError( # FIXME: exited?
-            "Solver exited without solving sudoku", sudoku=sudoku, map_=map_
-        )
-    return ready
+            return
+
+def choose_cell(sudoku:".sudoku.NativeSudoku", map_:"Map") -> int:
+    """Returns index of the empty cell with the fewest possible values"""
+    cells = sudoku.cells
+    candidates = map_.candidates
+    best = None
+    best_count = 10
+    for index in range(81):
+        if cells[index] == 0:
+            count = BIT_COUNT[candidates[index]]
+            if count < best_count:
+                if count <= 2:
+                    return index
+                best = index
+                best_count = count
+    if best is None:
+        raise SolvingError("Couldn't split", sudoku=sudoku, map_=map_)
+    return best
 
-def split(
+def propagate(
         sudoku:".sudoku.NativeSudoku", 
-        map_:"Map"
-        ) -> "[(.sudoku.NativeSudoku, Map), ...]":
-    """Splits a sudoku into multiple sudokus"""
-    for value, row, col in sudoku.iterate_cells():
-        if value != 0:
-            continue
-        values = map_.get_values(row, col)
-        sudokus_and_maps = []
-        for number in NATIVE_NUMBERS:
-            if number & values:
-                new_sudoku = deepcopy(sudoku)
-                new_map = deepcopy(map_)
-                new_sudoku.set_cell(row, col, number)
-                new_map.update(row, col, number)
-                sudokus_and_maps.append((new_sudoku, new_map))
-        return sudokus_and_maps
-    raise SolvingError("Couldn't split", sudoku=sudoku, map_=map_)
+        map_:"Map", 
+        stats:".stats.Stats"=None, 
+        techniques:"(function, ...)"=()
+        ) -> bool:
+    """Fills in singles until there are none left, returns whether changed
+    
+    When singles run out, techniques are tried in order until one of them
+    changes something, and then singles are filled in again. Techniques take
+    the sudoku and the map like the checks, see .techniques for them.
+    
+    With stats, every pass of a check or a technique is counted and timed by
+    its name.
+    """
+    changed = False
+    while True:
+        if stats is None:
+            while check_lines_boxes(sudoku, map_) or \
+                    check_all_cells(sudoku, map_):
+                changed = True
+        else:
+            run = stats.run
+            while run('check_lines_boxes', check_lines_boxes, sudoku, map_) or \
+                    run('check_all_cells', check_all_cells, sudoku, map_):
+                changed = True
+        if not techniques or map_.is_done():
+            return changed
+        for technique in techniques:
+            if stats is None:
+                progress = technique(sudoku, map_)
+            else:
+                progress = stats.run(
+                    technique.__name__, technique, sudoku, map_
+                )
+            if progress:
+                changed = True
+                break
+        else:
+            return changed
 
 def test_value_and_update(
         value:int, 
@@ -195,60 +492,36 @@ def test_value_and_update(
 def check_all_cells(sudoku:".sudoku.NativeSudoku", map_:"Map") -> bool:
     """Checks all cells if there is only one allowed value"""
     changed = False
-    for value, row, col in sudoku.iterate_cells():
-        if value == 0:
-            values = map_.get_values(row, col)
+    cells = sudoku.cells
+    candidates = map_.candidates
+    for index in range(81):
+        if cells[index] == 0:
+            values = candidates[index]
             if values == 0:
                 raise SolvingError("Broken map", sudoku=sudoku, map_=map_)
-            changed |= test_value_and_update(values, row, col, sudoku, map_)
+            changed |= test_value_and_update(
+                values, CELL_ROW[index], CELL_COL[index], sudoku, map_
+            )
     return changed
 
 def check_lines_boxes(sudoku:".sudoku.NativeSudoku", map_:"Map") -> bool:
     """Checks all rows, cols and boxes if there is one place for a value"""
     changed = False
-    for row in range(9):
-        row_map = map_.row_maps[row]
-        for value in NATIVE_NUMBERS:
-            if not row_map & value:
-                saved_col = None
-                positions = 0
-                for cell_val, col in sudoku.iterate_row(row):
-                    if cell_val == 0 and value & map_.get_values(row, col):
-                        positions += 1
-                        saved_col = col
-                if positions == 1:
-                    changed |= test_value_and_update(
-                        value, row, saved_col, sudoku, map_
-                    )
-    for col in range(9):
-        col_map = map_.col_maps[col]
-        for value in NATIVE_NUMBERS:
-            if not col_map & value:
-                saved_row = None
-                positions = 0
-                for cell_val, row in sudoku.iterate_col(col):
-                    if cell_val == 0 and value & map_.get_values(row, col):
-                        positions += 1
-                        saved_row = row
-                if positions == 1:
-                    changed |= test_value_and_update(
-                        value, saved_row, col, sudoku, map_
-                    )
-    for y in range(3):
-        for x in range(3):
-            box_map = map_.box_maps[y][x]
-            for value in NATIVE_NUMBERS:
-                if not box_map & value:
-                    saved_col = None
-                    saved_row = None
-                    positions = 0
-                    for cell_val, row, col in sudoku.iterate_box(y, x):
-                        if cell_val == 0 and value & map_.get_values(row, col):
-                            positions += 1
-                            saved_col = col
-                            saved_row = row
-                    if positions == 1:
-                        changed |= test_value_and_update(
-                            value, saved_row, saved_col, sudoku, map_
-                        )
+    positions = map_.positions
+    unit_maps = map_.unit_maps
+    for unit, indices in enumerate(UNITS):
+        base = unit*9
+        for digit in range(9):
+            places = positions[base + digit]
+            if places & (places - 1): # More than one place
+                continue
+            value = 1 << digit
+            if places == 0:
+                if not unit_maps[unit] & value:
+                    raise SolvingError("Broken map", sudoku=sudoku, map_=map_)
+                continue
+            index = indices[BIT_TO_DIGIT[places] - 1]
+            changed |= test_value_and_update(
+                value, CELL_ROW[index], CELL_COL[index], sudoku, map_
+            )
     return changed
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# 
+# Part of libsudoku library
+# Copyright (c) 2013, Tomi Leppänen
+# 
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+from time import perf_counter_ns
+
+class Stats:
+    """Counters and timings collected by a solver
+    
+    Solvers accept an optional stats argument and only collect anything when
+    it is given. Counters and timings (in nanoseconds) are kept by name, and
+    search solvers also keep counters per search depth.
+    """
+    __slots__ = ('counters', 'timings', 'levels', 'max_depth')
+    
+    def __init__(self):
+        self.counters = {}
+        self.timings = {}
+        self.levels = {}
+        self.max_depth = 0
+    
+    @classmethod
+    def from_dict(cls, data:dict) -> "Stats":
+        """Creates stats from a dict returned by to_dict"""
+        stats = cls()
+        stats.counters.update(data['counters'])
+        stats.timings.update(data['timings_ns'])
+        for depth, counters in data['levels'].items():
+            stats.levels[int(depth)] = dict(counters)
+        stats.max_depth = data['max_depth']
+        return stats
+    
+    def count(self, name:str, amount:int=1):
+        """Adds amount to a counter"""
+        self.counters[name] = self.counters.get(name, 0) + amount
+    
+    def count_level(self, depth:int, name:str, amount:int=1):
+        """Adds amount to a counter of a search depth"""
+        counters = self.levels.get(depth)
+        if counters is None:
+            counters = self.levels[depth] = {}
+            if depth > self.max_depth:
+                self.max_depth = depth
+        counters[name] = counters.get(name, 0) + amount
+    
+    def add_time(self, name:str, nanoseconds:int):
+        """Adds nanoseconds to a timing"""
+        self.timings[name] = self.timings.get(name, 0) + nanoseconds
+    
+    def run(self, name:str, function:"function", *args) -> object:
+        """Calls function with args, counting and timing it by name"""
+        self.counters[name] = self.counters.get(name, 0) + 1
+        start = perf_counter_ns()
+        try:
+            return function(*args)
+        finally:
+            self.add_time(name, perf_counter_ns() - start)
+    
+    def to_dict(self) -> dict:
+        """Returns the stats as a dict that can be dumped as JSON"""
+        return {
+            'counters': dict(self.counters), 
+            'timings_ns': dict(self.timings), 
+            'levels': { str(depth): dict(counters) 
+                for depth, counters in sorted(self.levels.items()) }, 
+            'max_depth': self.max_depth
+        }
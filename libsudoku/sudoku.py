@@ -17,40 +17,110 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 from array import array
-import math
+from functools import reduce
+from itertools import chain
+from operator import mul, or_
+import sys
+from .topology import (
+    BIT_TO_DIGIT, BOXES, CELL_COL, CELL_ROW, CELL_SPREAD, DIGIT_TO_BIT
+)
+
+# Translation tables from digits to low and high bytes of native numbers
+_LOW_BYTES = bytes(
+    DIGIT_TO_BIT[digit] & 0xFF if digit < 10 else 0 for digit in range(256)
+)
+_HIGH_BYTES = bytes(
+    DIGIT_TO_BIT[digit] >> 8 if digit < 10 else 0 for digit in range(256)
+)
+_LOW, _HIGH = (0, 1) if sys.byteorder == 'little' else (1, 0)
 
 class NativeSudoku:
-    """Native sudoku"""
+    """Native sudoku
+    
+    Cells are stored row by row in one flat array of 81 native numbers, so
+    copying a sudoku is a single buffer copy.
+    """
+    __slots__ = ('_cells', )
+    
     def __init__(self, arrays:[array, ...]):
         """Constructor, accepts a list of arrays as an argument"""
-        self._sudoku = arrays
+        self._cells = array('H', chain.from_iterable(arrays))
+        if len(self._cells) != 81:
+            raise ValueError("Sudoku must have 81 cells")
     
     def __eq__(self, obj:"NativeSudoku") -> bool:
         if not isinstance(obj, NativeSudoku):
             return False
-        return self._sudoku == obj._sudoku
+        return self._cells == obj._cells
+    
+    def __copy__(self) -> "NativeSudoku":
+        return self.copy()
+    
+    def __deepcopy__(self, memo:dict) -> "NativeSudoku":
+        return self.copy()
+    
+    @classmethod
+    def from_cells(cls, cells:"iterable of 81 ints") -> "NativeSudoku":
+        """Creates a sudoku from 81 native numbers in row-major order"""
+        sudoku = cls.__new__(cls)
+        sudoku._cells = array('H', cells)
+        if len(sudoku._cells) != 81:
+            raise ValueError("Sudoku must have 81 cells")
+        return sudoku
+    
+    @classmethod
+    def from_bytes(cls, data:bytes) -> "NativeSudoku":
+        """Creates a sudoku from 81 bytes, one digit (0-9) per cell
+        
+        This is the compact encoding returned by to_bytes.
+        """
+        if len(data) != 81:
+            raise ValueError("Sudoku must have 81 cells")
+        data = bytes(data)
+        buffer = bytearray(162)
+        buffer[_LOW::2] = data.translate(_LOW_BYTES)
+        buffer[_HIGH::2] = data.translate(_HIGH_BYTES)
+        sudoku = cls.__new__(cls)
+        sudoku._cells = array('H')
+        sudoku._cells.frombytes(buffer)
+        return sudoku
+    
+    @property
+    def cells(self) -> array:
+        """The flat cell buffer, row by row. Changes to it change the sudoku"""
+        return self._cells
     
     @property
     def filled(self):
-        for value, *ignore in self.iterate_cells():
-            if value == 0:
-                return False
-        return True
+        return 0 not in self._cells
     
     @property
     def readyness(self):
-        numbers = 0
-        for value, *ignore in self.iterate_cells():
-            if value != 0:
-                numbers += 1
-        return numbers / 81
-    
-    def get_box(self, y:int, x:int) -> [array, array, array]:
-        """Returns values of the box"""
-        box = []
-        for row in range(y*3, y*3+3):
-            box.append(array('I', self._sudoku[row][x*3 : x*3+3]))
-        return box
+        return (81 - self._cells.count(0)) / 81
+    
+    def copy(self) -> "NativeSudoku":
+        """Returns an independent copy of the sudoku"""
+        sudoku = NativeSudoku.__new__(NativeSudoku)
+        sudoku._cells = self._cells[:]
+        return sudoku
+    
+    def snapshot(self) -> array:
+        """Returns a copy of the cell buffer that can be given to restore"""
+        return self._cells[:]
+    
+    def restore(self, snapshot:array):
+        """Restores cells from a snapshot in place"""
+        self._cells[:] = snapshot
+    
+    def to_bytes(self) -> bytes:
+        """Returns the sudoku as 81 bytes, one digit (0-9) per cell"""
+        return bytes(map(BIT_TO_DIGIT.__getitem__, self._cells))
+    
+    def get_box(self, y:int, x:int) -> [memoryview, memoryview, memoryview]:
+        """Returns values of the box as views of its three rows"""
+        cells = memoryview(self._cells)
+        start = y*27 + x*3
+        return [ cells[base : base+3] for base in range(start, start+27, 9) ]
     
     def get_box_y_x_for_position(self, row:int, col:int) -> (int, int):
         """Returns box row and col for given row and col
@@ -71,77 +141,55 @@ class NativeSudoku:
     
     def get_cell(self, row:int, col:int) -> int:
         """Returns cell value"""
-        return self._sudoku[row][col]
+        return self._cells[row*9 + col]
     
-    def get_col(self, col:int) -> array:
-        """Returns values of a column"""
-        column = array('I')
-        for row in self._sudoku:
-            column.append(row[col])
-        return column
+    def get_col(self, col:int) -> memoryview:
+        """Returns values of a column as a view"""
+        return memoryview(self._cells)[col::9]
     
-    def get_row(self, row:int) -> array:
-        """Returns values of a row"""
-        return self._sudoku[row]
+    def get_row(self, row:int) -> memoryview:
+        """Returns values of a row as a view"""
+        return memoryview(self._cells)[row*9 : row*9+9]
     
     def is_valid(self) -> bool:
         """Tests whether the sudoku is valid"""
-        col_maps = [ 0 for i in range(9) ]
-        box_maps = [ [ 0 for j in range(9) ] for i in range(3) ]
-        for row in range(9):
-            row_map = 0
-            for col in range(9):
-                value = self._sudoku[row][col]
-                if value & row_map:
-                    return False
-                row_map |= value
-                if value & col_maps[col]:
-                    return False
-                col_maps[col] |= value
-                if value & box_maps[row//3-1][col//3-1]:
-                    return False
-                box_maps[row//3-1][col//3-1] |= value
-        return True
+        return is_valid_cells(self._cells)
     
     def iterate_box(self, y:int, x:int) -> "generator: (int, int, int)":
         """Generator, iterates given box as tuples (value, row, col)"""
-        for row in range(y*3, y*3+3):
-            for col in range(x*3, x*3+3):
-                yield (self._sudoku[row][col], row, col)
+        cells = self._cells
+        for index in BOXES[y*3 + x]:
+            yield (cells[index], CELL_ROW[index], CELL_COL[index])
         return
     
     def iterate_cells(self) -> "generator: (int, int, int)":
         """Generator, iterates cells as tuples (value, row, col)"""
-        for row in range(9):
-            for col in range(9):
-                yield (self._sudoku[row][col], row, col)
-        return
+        return zip(self._cells, CELL_ROW, CELL_COL)
     
     def iterate_col(self, col:int) -> "generator: (int, int)":
         """Generator, iterates given column as tuples (value, row)"""
-        for row in range(9):
-            yield (self._sudoku[row][col], row)
-        return
+        return zip(self._cells[col::9], range(9))
     
     def iterate_row(self, row:int) -> "generator: (int, int)":
         """Generator, iterates given row as tuples (value, col)"""
-        for col in range(9):
-            yield (self._sudoku[row][col], col)
-        return
+        return zip(self._cells[row*9 : row*9+9], range(9))
     
     def set_cell(self, row:int, col:int, value:int):
         """Sets cell value"""
-        self._sudoku[row][col] = value
+        self._cells[row*9 + col] = value
 
-NATIVE_NUMBERS = [
-    0b000000000, 
-    0b000000001, 
-    0b000000010, 
-    0b000000100, 
-    0b000001000, 
-    0b000010000, 
-    0b000100000, 
-    0b001000000, 
-    0b010000000, 
-    0b100000000
-]
+NATIVE_NUMBERS = list(DIGIT_TO_BIT)
+_NATIVE_NUMBERS = frozenset(NATIVE_NUMBERS)
+
+def is_valid_cells(cells:"sequence of 81 ints") -> bool:
+    """Tests whether 81 native numbers in row-major order are a valid sudoku
+    
+    Every cell must be empty or have one value. Every value is moved to the
+    lanes of its row, col and box in one number, so all 27 units are checked
+    at once: values are unique in every unit exactly when no two moved
+    values have common bits, that is when their sum equals their bitwise or.
+    """
+    if not _NATIVE_NUMBERS.issuperset(cells):
+        return False
+    spread = list(map(mul, cells, CELL_SPREAD))
+    return sum(spread) == reduce(or_, spread)
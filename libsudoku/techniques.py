@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+# 
+# Part of libsudoku library
+# Copyright (c) 2013, Tomi Leppänen
+# 
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Solving techniques working on the candidates of a Map
+
+Every technique takes a sudoku and its map like the checks in solvers and
+returns whether it changed anything. Techniques other than singles only
+remove candidates, with Map.eliminate going through the trail of the map,
+so their changes can be undone like any other.
+"""
+
+from itertools import combinations
+from .register import Register
+from .solvers import (
+    Budget, check_all_cells, check_lines_boxes, iterate_solutions, 
+    simple_solver, splitting_solver
+)
+from .topology import BIT_COUNT, UNITS
+
+def _intersections() -> ((int, int, int, int, (int, ...), (int, ...)), ...):
+    intersections = []
+    for box in range(18, 27):
+        box_cells = UNITS[box]
+        for line in set(unit for index in box_cells for unit in (
+                index // 9, 9 + index % 9)):
+            line_cells = UNITS[line]
+            common = set(line_cells) & set(box_cells)
+            intersections.append((
+                line, box, 
+                sum(1 << line_cells.index(index) for index in common), 
+                sum(1 << box_cells.index(index) for index in common), 
+                tuple(index for index in line_cells if index not in common), 
+                tuple(index for index in box_cells if index not in common)
+            ))
+    return tuple(sorted(intersections))
+
+# (line, box, common positions in line, common positions in box, rest of
+# line, rest of box) for every row and col crossing a box
+INTERSECTIONS = _intersections()
+
+def locked_candidates(
+        sudoku:".sudoku.NativeSudoku", 
+        map_:".solvers.Map"
+        ) -> bool:
+    """Removes candidates locked to the intersection of a box and a line
+    
+    If a value can go only to one line inside a box, it can't go anywhere
+    else on that line (pointing), and if it can go only to one box on a line,
+    it can't go anywhere else in that box (claiming).
+    """
+    changed = False
+    candidates = map_.candidates
+    positions = map_.positions
+    for line, box, line_mask, box_mask, line_rest, box_rest in INTERSECTIONS:
+        for digit in range(9):
+            value = 1 << digit
+            places = positions[box*9 + digit]
+            if places and not places & ~box_mask:
+                for index in line_rest:
+                    if candidates[index] & value:
+                        map_.eliminate(index, value)
+                        changed = True
+            places = positions[line*9 + digit]
+            if places and not places & ~line_mask:
+                for index in box_rest:
+                    if candidates[index] & value:
+                        map_.eliminate(index, value)
+                        changed = True
+    return changed
+
+def _naked_subsets(map_:".solvers.Map", size:int) -> bool:
+    """Removes values of size cells having only size values from their units"""
+    changed = False
+    candidates = map_.candidates
+    for indices in UNITS:
+        cells = [ index for index in indices
+            if 1 < BIT_COUNT[candidates[index]] <= size ]
+        for group in combinations(cells, size):
+            values = 0
+            for index in group:
+                values |= candidates[index]
+            if BIT_COUNT[values] != size:
+                continue
+            for index in indices:
+                if candidates[index] & values and index not in group:
+                    map_.eliminate(index, values)
+                    changed = True
+    return changed
+
+def _hidden_subsets(map_:".solvers.Map", size:int) -> bool:
+    """Removes other values from cells that are the only places of values
+    
+    Size values having their only places in the same size cells of a unit
+    must go to those cells, so nothing else can.
+    """
+    changed = False
+    candidates = map_.candidates
+    positions = map_.positions
+    for unit, indices in enumerate(UNITS):
+        base = unit*9
+        digits = [ digit for digit in range(9)
+            if 1 < BIT_COUNT[positions[base + digit]] <= size ]
+        for group in combinations(digits, size):
+            places = 0
+            values = 0
+            for digit in group:
+                places |= positions[base + digit]
+                values |= 1 << digit
+            if BIT_COUNT[places] != size:
+                continue
+            for position in range(9):
+                if places & 1 << position:
+                    index = indices[position]
+                    if candidates[index] & ~values:
+                        map_.eliminate(index, candidates[index] & ~values)
+                        changed = True
+    return changed
+
+def _fish(map_:".solvers.Map", size:int) -> bool:
+    """Removes a value from cover lines of a fish
+    
+    If the places of a value on size rows are all on the same size cols, the
+    value goes to those cols on those rows, and can't be anywhere else on
+    the cols. Same goes with rows and cols swapped.
+    """
+    changed = False
+    candidates = map_.candidates
+    positions = map_.positions
+    for digit in range(9):
+        value = 1 << digit
+        for base, cover in ((0, 9), (9, 0)): # Rows and cols as base lines
+            lines = [ line for line in range(9)
+                if 1 < BIT_COUNT[positions[(base + line)*9 + digit]] <= size ]
+            for group in combinations(lines, size):
+                places = 0
+                mask = 0
+                for line in group:
+                    places |= positions[(base + line)*9 + digit]
+                    mask |= 1 << line
+                if BIT_COUNT[places] != size:
+                    continue
+                for position in range(9):
+                    if not places & 1 << position:
+                        continue
+                    unit = cover + position
+                    if not positions[unit*9 + digit] & ~mask:
+                        continue
+                    for line, index in enumerate(UNITS[unit]):
+                        if candidates[index] & value and not mask & 1 << line:
+                            map_.eliminate(index, value)
+                            changed = True
+    return changed
+
+def naked_pairs(sudoku:".sudoku.NativeSudoku", map_:".solvers.Map") -> bool:
+    """Removes values of two cells with the same two values from units"""
+    return _naked_subsets(map_, 2)
+
+def naked_triples(sudoku:".sudoku.NativeSudoku", map_:".solvers.Map") -> bool:
+    """Removes values of three cells with three values from units"""
+    return _naked_subsets(map_, 3)
+
+def naked_quads(sudoku:".sudoku.NativeSudoku", map_:".solvers.Map") -> bool:
+    """Removes values of four cells with four values from units"""
+    return _naked_subsets(map_, 4)
+
+def hidden_pairs(sudoku:".sudoku.NativeSudoku", map_:".solvers.Map") -> bool:
+    """Keeps only two values in two cells that are their only places"""
+    return _hidden_subsets(map_, 2)
+
+def hidden_triples(sudoku:".sudoku.NativeSudoku", map_:".solvers.Map") -> bool:
+    """Keeps only three values in three cells that are their only places"""
+    return _hidden_subsets(map_, 3)
+
+def hidden_quads(sudoku:".sudoku.NativeSudoku", map_:".solvers.Map") -> bool:
+    """Keeps only four values in four cells that are their only places"""
+    return _hidden_subsets(map_, 4)
+
+def x_wing(sudoku:".sudoku.NativeSudoku", map_:".solvers.Map") -> bool:
+    """Fish with two base lines"""
+    return _fish(map_, 2)
+
+def swordfish(sudoku:".sudoku.NativeSudoku", map_:".solvers.Map") -> bool:
+    """Fish with three base lines"""
+    return _fish(map_, 3)
+
+def jellyfish(sudoku:".sudoku.NativeSudoku", map_:".solvers.Map") -> bool:
+    """Fish with four base lines"""
+    return _fish(map_, 4)
+
+# All techniques by name, from the cheapest to the most expensive to apply
+TECHNIQUES = {
+    'hidden_single': check_lines_boxes, 
+    'naked_single': check_all_cells, 
+    'locked_candidates': locked_candidates, 
+    'naked_pair': naked_pairs, 
+    'x_wing': x_wing, 
+    'hidden_pair': hidden_pairs, 
+    'naked_triple': naked_triples, 
+    'swordfish': swordfish, 
+    'hidden_triple': hidden_triples, 
+    'naked_quad': naked_quads, 
+    'jellyfish': jellyfish, 
+    'hidden_quad': hidden_quads, 
+}
+
+# Techniques used by the logic solvers, singles are always filled in first
+PIPELINE = (
+    locked_candidates, naked_pairs, x_wing, hidden_pairs, naked_triples, 
+    swordfish, hidden_triples
+)
+
+def pipeline(*names:str) -> "(function, ...)":
+    """Returns techniques by their names in TECHNIQUES to give to solvers"""
+    try:
+        return tuple(TECHNIQUES[name] for name in names)
+    except KeyError as error:
+        raise ValueError("Invalid technique name {}".format(error)) from None
+
+@Register.solver(name='logic')
+def logic_solver(
+        sudoku:".sudoku.NativeSudoku", 
+        stats:".stats.Stats"=None, 
+        limit:int=None, 
+        budget:Budget=None
+        ) -> ".sudoku.NativeSudoku":
+    """Simple solver using the techniques of PIPELINE"""
+    return simple_solver(sudoku, stats, PIPELINE)
+
+@Register.solver(name='logic_split')
+def logic_splitting_solver(
+        sudoku:".sudoku.NativeSudoku", 
+        stats:".stats.Stats"=None, 
+        limit:int=None, 
+        budget:Budget=None
+        ) -> "[.sudoku.NativeSudoku, ...]":
+    """Splitting solver using the techniques of PIPELINE at every node"""
+    return splitting_solver(sudoku, stats, PIPELINE, limit, budget)
+
+@Register.iterator(name='logic_split')
+def iterate_logic_solutions(
+        sudoku:".sudoku.NativeSudoku", 
+        stats:".stats.Stats"=None, 
+        budget:Budget=None
+        ) -> "generator: .sudoku.NativeSudoku":
+    """Generator, yields solutions of logic_split as they are found"""
+    return iterate_solutions(sudoku, stats, PIPELINE, budget)
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# 
+# Part of libsudoku library
+# Copyright (c) 2013, Tomi Leppänen
+# 
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Precomputed geometry of the sudoku grid
+
+Cells are indexed 0-80 row by row. Units are indexed 0-26: rows are 0-8,
+cols 9-17 and boxes 18-26, boxes going row by row. Native numbers are the
+bit presentation of digits, digit n being 1 << n-1.
+"""
+
+# Cells of every unit
+ROWS = tuple(tuple(range(row*9, row*9+9)) for row in range(9))
+COLS = tuple(tuple(range(col, 81, 9)) for col in range(9))
+BOXES = tuple(
+    tuple(row*9 + col for row in range(y*3, y*3+3) for col in range(x*3, x*3+3))
+    for y in range(3) for x in range(3)
+)
+UNITS = ROWS + COLS + BOXES
+
+# Row, col and box of every cell
+CELL_ROW = tuple(index // 9 for index in range(81))
+CELL_COL = tuple(index % 9 for index in range(81))
+CELL_BOX = tuple(
+    CELL_ROW[index] // 3 * 3 + CELL_COL[index] // 3 for index in range(81)
+)
+
+# (unit, position in unit) pairs of every cell, row first and box last
+CELL_UNITS = tuple(
+    tuple((unit, UNITS[unit].index(index)) for unit in (
+        CELL_ROW[index], 9 + CELL_COL[index], 18 + CELL_BOX[index]
+    ))
+    for index in range(81)
+)
+
+# Multiplier of every cell moving a value to the 9 bit lanes of its units in
+# a 243 bit number, lane n being bits 9n...9n+8 for unit n
+CELL_SPREAD = tuple(
+    sum(1 << 9*unit for unit, position in CELL_UNITS[index])
+    for index in range(81)
+)
+
+# The 20 cells that share a unit with every cell
+PEERS = tuple(
+    tuple(sorted(
+        set(ROWS[CELL_ROW[index]] + COLS[CELL_COL[index]] + 
+            BOXES[CELL_BOX[index]]) - {index}
+    ))
+    for index in range(81)
+)
+
+# Digit to native number and native number to digit, 0 for empty or mixed
+DIGIT_TO_BIT = tuple(0 if digit == 0 else 1 << digit-1 for digit in range(10))
+BIT_TO_DIGIT = tuple(
+    value.bit_length() if value & (value - 1) == 0 else 0
+    for value in range(512)
+)
+
+# Number of values in every value mask
+BIT_COUNT = tuple(bin(values).count('1') for values in range(512))
+
+ALL_VALUES = 0b111111111
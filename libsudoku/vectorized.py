@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+# 
+# Part of libsudoku library
+# Copyright (c) 2013, Tomi Leppänen
+# 
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""Singles for many sudokus at once with NumPy
+
+Sudokus are held as an (N, 81) uint16 array of native numbers. NumPy is
+optional: without it solve_boards solves every sudoku with the scalar solver
+and the array functions raise RuntimeError.
+"""
+
+from itertools import islice
+from .register import Register
+from .solvers import SolvingError
+from .sudoku import NativeSudoku
+from .topology import ALL_VALUES, BIT_COUNT, CELL_UNITS, UNITS
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+if numpy is not None:
+    _UNITS = numpy.array(UNITS, dtype=numpy.intp) # (27, 9) cells
+    _CELL_UNITS = numpy.array( # (81, 3) units
+        [ [ unit for unit, position in units ] for units in CELL_UNITS ], 
+        dtype=numpy.intp
+    )
+    _BIT_COUNT = numpy.array(BIT_COUNT, dtype=numpy.uint8)
+    _DIGITS = numpy.arange(9, dtype=numpy.uint16)
+
+def _require_numpy():
+    if numpy is None:
+        raise RuntimeError("NumPy is needed for vectorized sudokus")
+
+def to_array(sudokus:"iterable of .sudoku.NativeSudoku") -> "numpy.ndarray":
+    """Returns sudokus as an (N, 81) uint16 array"""
+    _require_numpy()
+    data = b''.join(sudoku.cells.tobytes() for sudoku in sudokus)
+    return numpy.frombuffer(data, dtype=numpy.uint16).reshape(-1, 81).copy()
+
+def from_array(boards:"numpy.ndarray") -> "[.sudoku.NativeSudoku, ...]":
+    """Returns rows of an (N, 81) array as sudokus"""
+    return [ NativeSudoku.from_cells(board) for board in boards.tolist() ]
+
+def unit_masks(boards:"numpy.ndarray") -> "numpy.ndarray":
+    """Returns the values in every unit of every board as an (N, 27) array"""
+    _require_numpy()
+    return numpy.bitwise_or.reduce(boards[:, _UNITS], axis=2)
+
+def valid_array(boards:"numpy.ndarray") -> "numpy.ndarray":
+    """Returns whether every board is valid as an (N, ) bool array
+    
+    A board is valid if every cell has at most one value and no unit has
+    the same value twice.
+    """
+    _require_numpy()
+    valid = (boards <= ALL_VALUES).all(axis=1)
+    boards = boards & ALL_VALUES
+    valid &= (_BIT_COUNT[boards] <= 1).all(axis=1)
+    counts = _BIT_COUNT[boards][:, _UNITS].sum(axis=2, dtype=numpy.uint8)
+    valid &= (_BIT_COUNT[unit_masks(boards)] == counts).all(axis=1)
+    return valid
+
+def _singles(boards:"numpy.ndarray") -> ("numpy.ndarray", "numpy.ndarray"):
+    """Returns values of singles and whether boards are broken"""
+    masks = unit_masks(boards) # (n, 27)
+    used = numpy.bitwise_or.reduce(masks[:, _CELL_UNITS], axis=2)
+    empty = boards == 0
+    candidates = numpy.where(empty, ~used & ALL_VALUES, 0).astype(numpy.uint16)
+    broken = (empty & (candidates == 0)).any(axis=1)
+    # Naked singles
+    placed = numpy.where(_BIT_COUNT[candidates] == 1, candidates, 0)
+    placed = placed.astype(numpy.uint16)
+    # Hidden singles, places of every digit in every unit as (n, 27, 9, 9)
+    places = (candidates[:, _UNITS, None] >> _DIGITS) & 1
+    counts = places.sum(axis=2) # (n, 27, 9 digits)
+    missing = (masks[:, :, None] >> _DIGITS) & 1 == 0
+    broken |= (missing & (counts == 0)).any(axis=(1, 2))
+    board, unit, digit = numpy.nonzero(counts == 1)
+    position = places[board, unit, :, digit].argmax(axis=1)
+    numpy.bitwise_or.at(
+        placed, (board, _UNITS[unit, position]), 
+        (1 << digit).astype(numpy.uint16)
+    )
+    broken |= (_BIT_COUNT[placed & ALL_VALUES] > 1).any(axis=1)
+    return placed, broken
+
+def propagate_array(
+        boards:"numpy.ndarray", 
+        stats:".stats.Stats"=None
+        ) -> "numpy.ndarray":
+    """Fills in naked and hidden singles on all boards until none are left
+    
+    Boards are changed in place. Every round finds the singles of all boards
+    that still changed in the previous one. Returns which boards are broken
+    as an (N, ) bool array, those are left as they were when found broken.
+    
+    With stats, counts rounds and the boards handled in them.
+    """
+    _require_numpy()
+    broken = ~valid_array(boards)
+    active = numpy.flatnonzero(~broken & (boards == 0).any(axis=1))
+    while active.size:
+        if stats is not None:
+            stats.count('rounds')
+            stats.count('boards', int(active.size))
+        part = boards[active]
+        placed, dead = _singles(part)
+        progress = (placed != 0).any(axis=1) & ~dead
+        broken[active[dead]] = True
+        active = active[progress]
+        part = part[progress] | placed[progress]
+        dead = ~valid_array(part)
+        boards[active] = part
+        broken[active[dead]] = True
+        active = active[~dead & (part == 0).any(axis=1)]
+    return broken
+
+def _solve(
+        sudoku:".sudoku.NativeSudoku", 
+        solver:"function", 
+        stats:".stats.Stats"
+        ) -> "[.sudoku.NativeSudoku, ...] or SolvingError":
+    try:
+        result = solver(sudoku, stats=stats)
+    except SolvingError as error:
+        return error
+    return result if isinstance(result, list) else [result]
+
+def solve_boards(
+        sudokus:"iterable of .sudoku.NativeSudoku", 
+        solver:str='split', 
+        blocksize:int=4096, 
+        stats:".stats.Stats"=None
+        ) -> "generator":
+    """Generator, solves many sudokus with singles for all of them at once
+    
+    Sudokus are handled in blocks of blocksize. Singles are filled in for a
+    whole block with NumPy and only the sudokus left unsolved go to solver.
+    Without NumPy every sudoku goes to solver.
+    
+    Yields for each sudoku in input order a list of its solutions or the
+    SolvingError raised for it. Sudokus solved by singles have only one
+    solution.
+    """
+    solve = Register.get_solver(solver)
+    if solve is None:
+        raise ValueError("Invalid solver name {}".format(solver))
+    sudokus = iter(sudokus)
+    if numpy is None:
+        for sudoku in sudokus:
+            yield _solve(sudoku, solve, stats)
+        return
+    while True:
+        block = list(islice(sudokus, blocksize))
+        if not block:
+            return
+        boards = to_array(block)
+        broken = propagate_array(boards, stats)
+        solved = ~broken & (boards != 0).all(axis=1)
+        for sudoku, board, broken_, solved_ in zip(
+                block, boards.tolist(), broken.tolist(), solved.tolist()):
+            if broken_:
+                yield SolvingError("Broken sudoku", sudoku=sudoku)
+            elif solved_:
+                yield [ NativeSudoku.from_cells(board) ]
+            else:
+                yield _solve(NativeSudoku.from_cells(board), solve, stats)
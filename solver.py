@@ -17,9 +17,11 @@
 # along with this program.  If not, see <http://www.gnu.org/licenses/>.
 
 import argparse
-from libsudoku.register import Register, discover
-from libsudoku.parsers import ParsingError
-from libsudoku.solvers import SolvingError
+import json
+from libsudoku.register import Register
+from libsudoku.parsers import ParsingError, read_lines
+from libsudoku.solvers import Budget, BudgetExceeded, SolvingError
+from libsudoku.stats import Stats
 
 def parse_arguments(*args) -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Sudoku solver")
@@ -44,7 +46,7 @@ def parse_arguments(*args) -> argparse.ArgumentParser:
         help="Parser to use (default: %(default)s)"
     )
     parser.add_argument(
-        '-e', '--separator',
+        '-e', '--separator', 
         help='Separator to be used when parsing sudoku'
     )
     parser.add_argument(
@@ -61,7 +63,7 @@ def parse_arguments(*args) -> argparse.ArgumentParser:
         dest='printer', 
         help="Printing style (default: %(default)s)"
     )
-
+    
     parser.add_argument(
         '-f', '--file', 
         action='append', 
@@ -70,6 +72,12 @@ def parse_arguments(*args) -> argparse.ArgumentParser:
         type=argparse.FileType(), 
         help='File containing a sudoku. Use - to read from stdin'
     )
+    parser.add_argument(
+        '-l', '--lines', 
+        action='store_true', 
+        default=False, 
+        help="Files contain one sudoku per line, read them lazily"
+    )
     parser.add_argument(
         '-i', '--input', 
         action='append', 
@@ -83,18 +91,62 @@ def parse_arguments(*args) -> argparse.ArgumentParser:
         type=argparse.FileType('w'), 
         help="Output file. Use - to output to stdout. (default: %(default)s)"
     )
+    parser.add_argument(
+        '-j', '--jobs', 
+        type=int, 
+        metavar='N', 
+        help="Solve sudokus in N worker processes"
+    )
+    parser.add_argument(
+        '-c', '--count', 
+        nargs='?', 
+        type=int, 
+        const=2, 
+        metavar='LIMIT', 
+        help="Output the number of solutions instead, counting at most LIMIT "
+            "(default: %(const)s, which tells whether the solution is unique)"
+    )
+    parser.add_argument(
+        '--stats', 
+        action='store_true', 
+        default=False, 
+        help="Output solver statistics as JSON after each sudoku"
+    )
     parser.add_argument(
         '-1', 
         action='store_true', 
         dest='single', 
         help="Solve and print only one solution"
     )
+    parser.add_argument(
+        '--max-time', 
+        type=float, 
+        metavar='SECONDS', 
+        help="Give up on a sudoku after SECONDS of searching"
+    )
+    parser.add_argument(
+        '--max-nodes', 
+        type=int, 
+        metavar='N', 
+        help="Give up on a sudoku after searching N nodes"
+    )
+    parser.add_argument(
+        '--max-solutions', 
+        type=int, 
+        metavar='N', 
+        help="Give up on a sudoku that has more than N solutions"
+    )
     if args:
         args = parser.parse_args(args)
     else:
         args = parser.parse_args()
     if isinstance(args.solver, list): # A little fix
         args.solver = args.solver[0]
+    if args.count is not None and args.jobs:
+        parser.error("--count can't be used with --jobs")
+    args.budget = None
+    if (args.max_time, args.max_nodes, args.max_solutions) != (None,)*3:
+        args.budget = Budget(args.max_time, args.max_nodes, args.max_solutions)
     return args
 
 class UIError(Exception):
@@ -124,21 +176,58 @@ def parse(
 def solve(
         sudoku:"sudoku.NativeSudoku", 
         solver_name:str, 
-        args:"Namespace"
+        args:"Namespace", 
+        stats:"Stats"=None
         ) -> "sudoku.NativeSudoku|[sudoku.NativeSudoku, ...]":
     """Solves NativeSudoku with solver determined by solver"""
     solver = Register.get_solver(solver_name)
     if solver is None:
         raise UIError("Invalid solver name {}".format(solver_name))
     try:
-        return solver(sudoku)
+        return solver(
+            sudoku, stats=stats, limit=1 if args.single else None, 
+            budget=args.budget
+        )
+    except BudgetExceeded as error: # Output what was found
+        report_error(error, args)
+        return error.solutions
     except SolvingError as error:
-        print("Solver returned error '{}'".format(error))
-        if args.verbosity:
-            print("Incomplete sudoku: ", end="")
-            Register.get_printer('list')(error.sudoku)
-        if args.exceptions:
-            raise
+        report_error(error, args)
+
+def solve_lazily(
+        sudoku:"sudoku.NativeSudoku", 
+        iterator:"function", 
+        args:"Namespace", 
+        stats:"Stats"=None
+        ):
+    """Solves NativeSudoku outputting solutions as they are found
+    
+    With --single (-1) the search stops at the first solution.
+    """
+    try:
+        number = 0
+        for solved in iterator(sudoku, stats, budget=args.budget):
+            number += 1
+            if args.verbosity and number == 1:
+                print("Solved sudoku")
+            if args.single:
+                output(solved, args.printer, args.separator, args.output, args)
+                break
+            args.output.write("Solution {}:\n".format(number))
+            output(solved, args.printer, args.separator, args.output, args)
+        if number == 0:
+            raise SolvingError("Sudoku has no solutions", sudoku=sudoku)
+    except SolvingError as error:
+        report_error(error, args)
+
+def report_error(error:"SolvingError", args:"Namespace"):
+    """Reports an error returned by solver"""
+    print("Solver returned error '{}'".format(error))
+    if args.verbosity:
+        print("Incomplete sudoku: ", end="")
+        Register.get_printer('list')(error.sudoku)
+    if args.exceptions:
+        raise error
 
 def output(
         sudoku:"sudoku.NativeSudoku", 
@@ -151,46 +240,108 @@ def output(
     printer = Register.get_printer(printer_name)
     if printer is None:
         raise UIError("Invalid printer name {}".format(printer_name))
-    printer(sudoku)
+    printer(sudoku, file=output)
+
+def output_stats(stats:"Stats", args:"Namespace"):
+    """Outputs solver statistics as JSON"""
+    args.output.write(json.dumps(stats.to_dict()))
+    args.output.write("\n")
 
 def process(string:str, args:"Namespace"):
     """Processes string by arguments"""
     sudoku = parse(string, args.parser, args)
-    if sudoku:
-        if args.verbosity:
-            print("Parsed sudoku")
-        sudoku = solve(sudoku, args.solver, args)
-    if sudoku:
-        if args.verbosity:
-            print("Solved sudoku")
-        if isinstance(sudoku, list):
-            i = 1
-            for sudoku_ in sudoku:
-                print("Solution {}:".format(i))
-                output(sudoku_, args.printer, args.separator, args.output, args)
-                i += 1
+    if not sudoku:
+        return
+    if args.verbosity:
+        print("Parsed sudoku")
+    if args.count is not None:
+        from libsudoku.dlx import count_solutions # Only needed to count
+        args.output.write("{}\n".format(count_solutions(sudoku, args.count)))
+        return
+    stats = Stats() if args.stats else None
+    iterator = Register.get_iterator(args.solver)
+    if iterator is not None:
+        solve_lazily(sudoku, iterator, args, stats)
+    else:
+        sudoku = solve(sudoku, args.solver, args, stats)
+        if sudoku:
+            output_solutions(sudoku, args)
+    if stats is not None:
+        output_stats(stats, args)
+
+def output_solutions(
+        sudoku:"sudoku.NativeSudoku|[sudoku.NativeSudoku, ...]", 
+        args:"Namespace"
+        ):
+    """Outputs what solver returned
+    
+    With --single (-1) only the first solution is output, like solve_lazily
+    does.
+    """
+    if args.verbosity:
+        print("Solved sudoku")
+    if isinstance(sudoku, list) and args.single:
+        output(sudoku[0], args.printer, args.separator, args.output, args)
+    elif isinstance(sudoku, list):
+        i = 1
+        for sudoku_ in sudoku:
+            args.output.write("Solution {}:\n".format(i))
+            output(sudoku_, args.printer, args.separator, args.output, args)
+            i += 1
+    else:
+        output(sudoku, args.printer, args.separator, args.output, args)
+
+def process_many(strings:"iterable of str", args:"Namespace"):
+    """Processes strings by arguments, solving in worker processes"""
+    from libsudoku.batch import solve_many # Not needed without --jobs
+    sudokus = ( parse(string, args.parser, args) for string in strings )
+    sudokus = ( sudoku for sudoku in sudokus if sudoku )
+    results = solve_many(
+        sudokus, args.solver, workers=args.jobs, stats=args.stats, 
+        limit=1 if args.single else None, budget=args.budget
+    )
+    for result in results:
+        if args.stats:
+            result, stats = result
+        if isinstance(result, BudgetExceeded): # Output what was found
+            if result.solutions:
+                output_solutions(result.solutions, args)
+            report_error(result, args)
+        elif isinstance(result, SolvingError):
+            report_error(result, args)
         else:
-            output(sudoku, args.printer, args.separator, args.output, args)
+            output_solutions(result, args)
+        if args.stats:
+            output_stats(stats, args)
+
+def read_strings(args:"Namespace") -> "generator: str":
+    """Generator, reads sudoku strings from files and arguments"""
+    if args.files:
+        for file_ in args.files:
+            if args.verbosity:
+                print("Processing file: {}".format(file_.name))
+            if args.lines:
+                yield from read_lines(file_)
+                continue
+            sudoku = file_.read()
+            if sudoku.endswith("\n"):
+                sudoku = sudoku[:-1]
+            yield sudoku
+    if args.sudokus:
+        for string in args.sudokus:
+            if args.verbosity:
+                print("Processing argument: {}".format(string))
+            yield string
 
 def main(*args):
     args = parse_arguments(*args)
-    discover()
     if not args.files and not args.sudokus:
         raise NotImplementedError("Called without --file or --input")
+    elif args.jobs:
+        process_many(read_strings(args), args)
     else:
-        if args.files:
-            for file_ in args.files:
-                if args.verbosity:
-                    print("Processing file: {}".format(file_.name))
-                sudoku = file_.read()
-                if sudoku.endswith("\n"):
-                    sudoku = sudoku[:-1]
-                process(sudoku, args)
-        if args.sudokus:
-            for string in args.sudokus:
-                if args.verbosity:
-                    print("Processing argument: {}".format(string))
-                process(string, args)
+        for string in read_strings(args):
+            process(string, args)
 
 if __name__ == "__main__":
     main()
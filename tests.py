@@ -4,7 +4,9 @@
 from libsudoku import *
 from libsudoku.sudoku import NATIVE_NUMBERS
 from array import array
-import doctest, unittest
+from libsudoku.printers import print_as_list, print_as_table
+import asyncio, contextlib, doctest, io, json, os, subprocess, sys, unittest
+import solver
 
 CORRECT_INCOMPLETE = [
     [5,3,0, 0,7,0, 0,0,0], 
@@ -61,6 +63,41 @@ class TestParsers(unittest.TestCase):
 )
         self.assertEqual(self.correct, result)
     
+    def test_ignoring_parser(self):
+        result = parsers.ignoring_parser('53..7....6..195....98....6.8...6...3'+
+            '4..8.3..17...2...6.6....28....419..5....8..79')
+        self.assertEqual(self.correct, result)
+    
+    def test_native_parser(self):
+        value = ('53..7....6..195....98....6.8...6...34..8.3..17...2...6.6..'+
+            '..28....419..5....8..79')
+        self.assertEqual(self.correct_native, parsers.native_parser(value))
+        self.assertEqual(self.correct_native, 
+            parsers.native_parser(memoryview(value.encode() + b'\n')))
+        self.assertRaises(parsers.ParsingError, parsers.native_parser, b'123')
+        self.assertIs(
+            parsers.native_parser, register.Register.get_parser('native')
+        )
+    
+    def test_parse_records(self):
+        record = ('53..7....6..195....98....6.8...6...34..8.3..17...2...6.6..'+
+            '..28....419..5....8..79\n').encode()
+        results = list(parsers.parse_records(record * 4 + record[:-1], 
+            block_size=3))
+        self.assertEqual([ self.correct_native ] * 5, results)
+    
+    def test_parse_lines(self):
+        line = '5,3,0,0,7,0,0,0,0,6,0,0,1,9,5,0,0,0,0,9,8,0,0,0,0,6,0,8,0,0,'+ \
+            '0,6,0,0,0,3,4,0,0,8,0,3,0,0,1,7,0,0,0,2,0,0,0,6,0,6,0,0,0,0,'+ \
+            '2,8,0,0,0,0,4,1,9,0,0,5,0,0,0,0,8,0,0,7,9'
+        results = list(parsers.parse_lines(
+            iter([line + '\n', '\n', '1,2,3\n', line]), 'list'
+        ))
+        self.assertEqual(3, len(results))
+        self.assertEqual(self.correct_native, results[0])
+        self.assertIsInstance(results[1], parsers.ParsingError)
+        self.assertEqual(self.correct_native, results[2])
+    
     def test_convert_to_native_number(self):
         for number in range(10):
             self.assertEqual(
@@ -170,6 +207,29 @@ class TestNativeSudoku(unittest.TestCase):
                 value, *ignore = next(generator)
                 self.assertEqual(values[y][x], value)
     
+    def test_copy(self):
+        copy = self.sudoku.copy()
+        self.assertEqual(self.sudoku, copy)
+        copy.set_cell(0, 2, 8)
+        self.assertEqual(0, self.sudoku.get_cell(0, 2))
+        self.assertNotEqual(self.sudoku, copy)
+    
+    def test_snapshot_restore(self):
+        copy = self.sudoku.copy()
+        row = copy.get_row(0)
+        snapshot = copy.snapshot()
+        copy.set_cell(0, 2, 8)
+        self.assertEqual(8, row[2])
+        copy.restore(snapshot)
+        self.assertEqual(self.sudoku, copy)
+        self.assertEqual(0, row[2])
+    
+    def test_bytes(self):
+        data = self.sudoku.to_bytes()
+        self.assertEqual(81, len(data))
+        self.assertEqual(b'\x05\x03\x00\x00\x07', data[:5])
+        self.assertEqual(self.sudoku, sudoku.NativeSudoku.from_bytes(data))
+    
     def test_checking(self):
         self.assertEqual(True, self.sudoku.is_valid())
         self.assertEqual(False, sudoku.NativeSudoku([
@@ -187,9 +247,127 @@ class TestNativeSudoku(unittest.TestCase):
             ]).is_valid()
         )
 
+    def test_checking_boxes(self):
+        solution = dlx.dlx_solver(self.sudoku)[0]
+        self.assertTrue(solution.is_valid())
+        for box in range(9):
+            first, second = topology.BOXES[box][0], topology.BOXES[box][4]
+            broken = sudoku.NativeSudoku.from_cells([0] * 81)
+            broken.cells[first] = broken.cells[second] = 1
+            self.assertFalse(broken.is_valid())
+            broken.cells[second] = 0
+            for index in range(81): # Same value in other boxes is fine
+                if topology.CELL_BOX[index] == box or \
+                        index in topology.PEERS[first]:
+                    continue
+                broken.cells[index] = 1
+                self.assertTrue(broken.is_valid())
+                broken.cells[index] = 0
+    
+    def test_validate_many(self):
+        broken = self.sudoku.copy()
+        broken.set_cell(0, 2, 16)
+        several = self.sudoku.copy()
+        several.set_cell(0, 2, 0b11)
+        self.assertFalse(several.is_valid())
+        sudokus = [ self.sudoku, broken ] * 3
+        self.assertEqual(
+            [True, False] * 3, list(batch.validate_many(sudokus, workers=0))
+        )
+        self.assertEqual([True, False] * 3, list(
+            batch.validate_many(sudokus, workers=2, chunksize=2)
+        ))
+        numpy = vectorized.numpy
+        vectorized.numpy = None
+        try:
+            self.assertEqual([True, False] * 3, list(
+                batch.validate_many(sudokus, workers=0, chunksize=4)
+            ))
+            self.assertEqual([False], list(
+                batch.validate_many([ several ], workers=0)
+            ))
+        finally:
+            vectorized.numpy = numpy
+        if numpy is not None:
+            self.assertEqual([False], list(
+                batch.validate_many([ several ], workers=0)
+            ))
+
+class TestPrinters(unittest.TestCase):
+    def setUp(self):
+        self.sudoku = CORRECT_INCOMPLETE_NATIVE
+    
+    def test_print_as_table(self):
+        file_ = io.StringIO()
+        print_as_table(self.sudoku, file=file_)
+        lines = file_.getvalue().split("\n")
+        self.assertEqual(12, len(lines))
+        self.assertEqual("53 \u2502 7 \u2502   ", lines[0])
+        self.assertEqual("\u2500\u2500\u2500\u253C"*2 + "\u2500"*3, lines[3])
+        self.assertEqual("   \u2502 8 \u2502 79", lines[10])
+        self.assertEqual("", lines[11])
+    
+    def test_print_as_list(self):
+        file_ = io.StringIO()
+        print_as_list(self.sudoku, file=file_)
+        self.assertEqual(
+            "5,3,0,0,7,0,0,0,0,6,0,0,1,9,5,0,0,0,0,9,8,0,0,0,0,6,0,8,0,0,0,6,"+
+            "0,0,0,3,4,0,0,8,0,3,0,0,1,7,0,0,0,2,0,0,0,6,0,6,0,0,0,0,2,8,0,0,"+
+            "0,0,4,1,9,0,0,5,0,0,0,0,8,0,0,7,9\n", 
+            file_.getvalue()
+        )
+
+class TestTopology(unittest.TestCase):
+    def test_units(self):
+        self.assertEqual(27, len(topology.UNITS))
+        for unit in topology.UNITS:
+            self.assertEqual(9, len(set(unit)))
+        self.assertEqual((60, 61, 62, 69, 70, 71, 78, 79, 80), 
+            topology.BOXES[8])
+    
+    def test_peers(self):
+        for index, peers in enumerate(topology.PEERS):
+            self.assertEqual(20, len(peers))
+            self.assertNotIn(index, peers)
+        self.assertIn(20, topology.PEERS[0])
+        self.assertNotIn(30, topology.PEERS[0])
+    
+    def test_bits(self):
+        for digit in range(1, 10):
+            self.assertEqual(digit, 
+                topology.BIT_TO_DIGIT[topology.DIGIT_TO_BIT[digit]])
+        self.assertEqual(0, topology.BIT_TO_DIGIT[0b11])
+
+class TestRegister(unittest.TestCase):
+    def test_entry_points(self):
+        register.discover()
+        for kind, names in register.ENTRY_POINTS.items():
+            registered = getattr(register.Register, '_' + kind)
+            self.assertEqual(set(names), set(registered))
+            for name, module in names.items():
+                self.assertEqual(
+                    'libsudoku.' + module, registered[name].__module__
+                )
+    
+    def test_lazy_imports(self):
+        code = (
+            "import sys, libsudoku\n"
+            "libsudoku.Register.get_solver('dlx')\n"
+            "libsudoku.Register.get_printers()\n"
+            "print(' '.join(sorted(sys.modules)))"
+        )
+        output = subprocess.run(
+            [sys.executable, '-c', code], check=True, capture_output=True, 
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.decode().split()
+        self.assertIn('libsudoku.dlx', output)
+        for module in ('libsudoku.batch', 'libsudoku.printers', 
+                'libsudoku.techniques', 'libsudoku.vectorized', 'numpy'):
+            self.assertNotIn(module, output)
+
 class TestSolving(unittest.TestCase):
     def setUp(self):
-        self.test_sudoku = CORRECT_INCOMPLETE_NATIVE
+        self.test_sudoku = CORRECT_INCOMPLETE_NATIVE.copy()
         self.answer = sudoku.NativeSudoku([
             array('I', ( 16,   4,   8,  32,  64, 128, 256,   1,   2)),
             array('I', ( 32,  64,   2,   1, 256,  16,   4,   8, 128)),
@@ -207,13 +385,875 @@ class TestSolving(unittest.TestCase):
         self.assertEqual(0b101010000, self.map.get_values(4, 6))
         self.assertEqual(0b000011000, self.map.get_values(3, 4))
     
+    def test_map_update(self):
+        self.test_sudoku.set_cell(4, 6, 16)
+        self.map.update(4, 6, 16)
+        fresh = solvers.Map(self.test_sudoku)
+        self.assertEqual(fresh.candidates, self.map.candidates)
+        self.assertEqual(fresh.positions, self.map.positions)
+        self.assertEqual(0b100000010, self.map.get_values(4, 7))
+        self.assertEqual(0b101100000, self.map.get_positions(0, 128))
+    
+    def test_map_undo(self):
+        fresh = solvers.Map(self.test_sudoku.copy())
+        mark = self.map.mark()
+        self.map.place(40, 16)
+        solvers.propagate(self.test_sudoku, self.map)
+        self.assertTrue(self.map.is_done())
+        self.map.undo(mark)
+        self.assertEqual(CORRECT_INCOMPLETE_NATIVE, self.test_sudoku)
+        self.assertEqual(fresh.candidates, self.map.candidates)
+        self.assertEqual(fresh.positions, self.map.positions)
+        self.assertEqual(fresh.unit_maps, self.map.unit_maps)
+    
+    def test_map_eliminate(self):
+        fresh = solvers.Map(self.test_sudoku.copy())
+        mark = self.map.mark()
+        self.map.eliminate(4*9 + 7, 0b10)
+        self.assertEqual(0b100010000, self.map.get_values(4, 7))
+        self.assertFalse(self.map.get_positions(4, 2) & 1 << 7)
+        self.map.undo(mark)
+        self.assertEqual(fresh.candidates, self.map.candidates)
+        self.assertEqual(fresh.positions, self.map.positions)
+    
     def test_simple_solver(self):
         sudoku = solvers.simple_solver(self.test_sudoku)
         self.assertEqual(self.answer, sudoku)
+    
+    def test_splitting_solver(self):
+        self.test_sudoku.set_cell(0, 4, 0)
+        self.test_sudoku.set_cell(1, 0, 0)
+        sudokus = solvers.splitting_solver(self.test_sudoku)
+        self.assertEqual([self.answer], sudokus)
+    
+    def test_splitting_solver_multiple(self):
+        self.test_sudoku.set_cell(0, 0, 0)
+        self.test_sudoku.set_cell(0, 1, 0)
+        sudokus = solvers.splitting_solver(self.test_sudoku)
+        self.assertEqual(2, len(sudokus))
+        self.assertIn(self.answer, sudokus)
+        first = solvers.splitting_solver(self.test_sudoku, limit=1)
+        self.assertEqual(sudokus[:1], first)
+    
+    def test_iterate_solutions(self):
+        self.test_sudoku.set_cell(0, 0, 0)
+        self.test_sudoku.set_cell(0, 1, 0)
+        collected = stats.Stats()
+        solutions = solvers.iterate_solutions(self.test_sudoku, collected)
+        first = next(solutions)
+        self.assertTrue(first.is_valid() and first.filled)
+        self.assertEqual(1, collected.counters['solutions'])
+        solutions.close()
+        self.assertEqual(1, collected.counters['solutions'])
+        for name in ('split', 'dlx', 'logic_split', 'bitboard'):
+            iterator = register.Register.get_iterator(name)
+            self.assertEqual(2, len(list(iterator(self.test_sudoku))))
+        self.assertIsNone(register.Register.get_iterator('simple'))
+
+    def test_budget(self):
+        empty = sudoku.NativeSudoku.from_cells([ 0 ] * 81)
+        for solver in (
+                solvers.splitting_solver, dlx.dlx_solver, 
+                bitboard.bitboard_solver):
+            collected = stats.Stats()
+            with self.assertRaises(solvers.BudgetExceeded) as context:
+                solver(empty, collected, budget=solvers.Budget(solutions=3))
+            error = context.exception
+            self.assertEqual('solutions', error.reason)
+            self.assertEqual(3, len(error.solutions))
+            self.assertEqual(3, collected.counters['solutions'])
+            self.assertEqual(error.nodes, collected.counters['nodes'])
+            with self.assertRaises(solvers.BudgetExceeded) as context:
+                solver(empty, budget=solvers.Budget(nodes=5))
+            self.assertEqual('nodes', context.exception.reason)
+            self.assertEqual(5, context.exception.nodes)
+            with self.assertRaises(solvers.BudgetExceeded) as context:
+                solver(empty, budget=solvers.Budget(time=0))
+            self.assertEqual('time', context.exception.reason)
+            budget = solvers.Budget(time=10, nodes=1000, solutions=1)
+            self.assertEqual([self.answer], solver(self.test_sudoku, 
+                budget=budget))
+        results = list(batch.solve_many(
+            [ empty, self.test_sudoku ], 'split', workers=0, 
+            budget=solvers.Budget(solutions=1)
+        ))
+        self.assertIsInstance(results[0], solvers.BudgetExceeded)
+        self.assertEqual(1, len(results[0].solutions))
+        self.assertEqual([self.answer], results[1])
+
+class TestStats(unittest.TestCase):
+    def test_split_stats(self):
+        sudoku = CORRECT_INCOMPLETE_NATIVE.copy()
+        sudoku.set_cell(0, 0, 0)
+        sudoku.set_cell(0, 1, 0)
+        collected = stats.Stats()
+        solvers.splitting_solver(sudoku, stats=collected)
+        self.assertEqual(2, collected.counters['solutions'])
+        self.assertEqual(2, collected.counters['branches'])
+        self.assertEqual(3, collected.counters['nodes'])
+        self.assertEqual({'nodes': 1, 'branches': 2}, collected.levels[0])
+        self.assertEqual(1, collected.max_depth)
+        self.assertIn('check_lines_boxes', collected.timings)
+        data = json.loads(json.dumps(collected.to_dict()))
+        self.assertEqual(collected.to_dict(), 
+            stats.Stats.from_dict(data).to_dict())
+    
+    def test_solve_many_stats(self):
+        results = list(batch.solve_many(
+            [ CORRECT_INCOMPLETE_NATIVE ], 'dlx', workers=0, stats=True
+        ))
+        result, collected = results[0]
+        self.assertEqual(1, len(result))
+        self.assertEqual(1, collected.counters['solutions'])
+    
+    def test_solve_many_limit(self):
+        sudoku = CORRECT_INCOMPLETE_NATIVE.copy()
+        sudoku.set_cell(0, 0, 0)
+        sudoku.set_cell(0, 1, 0)
+        for solver in ('split', 'dlx'):
+            results = list(batch.solve_many(
+                [ sudoku ], solver, workers=0, limit=1
+            ))
+            self.assertEqual(1, len(results[0]))
+
+class TestDancingLinks(unittest.TestCase):
+    def setUp(self):
+        self.test_sudoku = CORRECT_INCOMPLETE_NATIVE.copy()
+        self.answer = solvers.simple_solver(CORRECT_INCOMPLETE_NATIVE.copy())
+    
+    def test_exact_cover(self):
+        links = dlx.DancingLinks(4, [[0, 1], [2], [1, 2], [3], [0, 3]])
+        self.assertEqual(
+            [[0, 1, 3], [2, 4]], 
+            sorted(sorted(rows) for rows in links.solutions())
+        )
+    
+    def test_dlx_solver(self):
+        self.assertEqual([self.answer], dlx.dlx_solver(self.test_sudoku))
+        self.assertEqual(CORRECT_INCOMPLETE_NATIVE, self.test_sudoku)
+    
+    def test_dlx_solver_multiple(self):
+        self.test_sudoku.set_cell(0, 0, 0)
+        self.test_sudoku.set_cell(0, 1, 0)
+        sudokus = dlx.dlx_solver(self.test_sudoku)
+        self.assertEqual(2, len(sudokus))
+        self.assertIn(self.answer, sudokus)
+        self.assertEqual(1, len(dlx.dlx_solver(self.test_sudoku, limit=1)))
+        self.assertEqual(
+            2, dlx.count_solutions(self.test_sudoku, limit=None)
+        )
+        self.assertEqual(1, dlx.count_solutions(self.test_sudoku, limit=1))
+    
+    def test_count_solutions(self):
+        self.assertEqual(1, dlx.count_solutions(self.test_sudoku))
+        self.assertTrue(dlx.is_unique(self.test_sudoku))
+        for row in range(3):
+            for col in range(9):
+                self.test_sudoku.set_cell(row, col, 0)
+        self.assertEqual(2, dlx.count_solutions(self.test_sudoku))
+        self.assertEqual(10, dlx.count_solutions(self.test_sudoku, limit=10))
+        self.assertFalse(dlx.is_unique(self.test_sudoku))
+    
+    def test_dlx_solver_unsolvable(self):
+        self.test_sudoku.set_cell(0, 2, 0)
+        self.test_sudoku.set_cell(0, 3, 256)
+        self.assertRaises(
+            solvers.SolvingError, dlx.dlx_solver, self.test_sudoku
+        )
+        self.assertEqual(0, dlx.count_solutions(self.test_sudoku))
+
+class TestBitboard(unittest.TestCase):
+    def setUp(self):
+        self.test_sudoku = CORRECT_INCOMPLETE_NATIVE.copy()
+        self.answer = solvers.simple_solver(CORRECT_INCOMPLETE_NATIVE.copy())
+    
+    def test_bitboard_solver(self):
+        collected = stats.Stats()
+        self.assertEqual(
+            [self.answer], bitboard.bitboard_solver(self.test_sudoku, collected)
+        )
+        self.assertEqual(CORRECT_INCOMPLETE_NATIVE, self.test_sudoku)
+        self.assertEqual(1, collected.counters['solutions'])
+        self.assertIs(
+            bitboard.bitboard_solver, register.Register.get_solver('bitboard')
+        )
+    
+    def test_bitboard_solver_multiple(self):
+        self.test_sudoku.set_cell(0, 0, 0)
+        self.test_sudoku.set_cell(0, 1, 0)
+        sudokus = bitboard.bitboard_solver(self.test_sudoku)
+        self.assertEqual(
+            sorted(solved.to_bytes() for solved in sudokus), 
+            sorted(solved.to_bytes()
+                for solved in dlx.dlx_solver(self.test_sudoku))
+        )
+        self.assertIn(self.answer, sudokus)
+        self.assertEqual(sudokus[:1], 
+            bitboard.bitboard_solver(self.test_sudoku, limit=1))
+        empty = sudoku.NativeSudoku.from_cells([ 0 ] * 81)
+        solutions = bitboard.bitboard_solver(empty, limit=5)
+        self.assertEqual(5, len(set(solved.to_bytes() for solved in solutions)))
+        self.assertTrue(all(solved.is_valid() and solved.filled
+            for solved in solutions))
+    
+    def test_bitboard_solver_unsolvable(self):
+        self.test_sudoku.set_cell(0, 2, 0)
+        self.test_sudoku.set_cell(0, 3, 256)
+        self.assertRaises(
+            solvers.SolvingError, bitboard.bitboard_solver, self.test_sudoku
+        )
+        self.test_sudoku.set_cell(0, 2, 256)
+        self.assertRaises(
+            solvers.SolvingError, bitboard.bitboard_solver, self.test_sudoku
+        )
+    
+    def test_corpora(self):
+        for corpus in ('easy', '17-clue', 'invalid'):
+            path = os.path.join(bench.CORPORA_DIR, corpus + '.txt')
+            for sudoku_ in bench.load_corpus(path):
+                try:
+                    expected = dlx.dlx_solver(sudoku_.copy())
+                except solvers.SolvingError:
+                    self.assertRaises(
+                        solvers.SolvingError, bitboard.bitboard_solver, 
+                        sudoku_
+                    )
+                else:
+                    self.assertEqual(
+                        expected, bitboard.bitboard_solver(sudoku_)
+                    )
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.answer = solvers.simple_solver(CORRECT_INCOMPLETE_NATIVE.copy())
+        self.broken = CORRECT_INCOMPLETE_NATIVE.copy()
+        self.broken.set_cell(0, 2, 16)
+        self.sudokus = [ CORRECT_INCOMPLETE_NATIVE, self.broken ] * 3
+    
+    def check_results(self, results):
+        self.assertEqual(6, len(results))
+        for result in results[::2]:
+            self.assertEqual([self.answer], result)
+        for result in results[1::2]:
+            self.assertIsInstance(result, solvers.SolvingError)
+            self.assertEqual(self.broken, result.sudoku)
+    
+    def test_solve_many_in_process(self):
+        self.check_results(list(
+            batch.solve_many(self.sudokus, workers=0, chunksize=4)
+        ))
+    
+    def test_solve_many(self):
+        self.check_results(list(
+            batch.solve_many(self.sudokus, workers=2, chunksize=2)
+        ))
+    
+    def test_solve_many_unordered(self):
+        results = batch.solve_many(
+            self.sudokus, 'simple', workers=2, chunksize=1, ordered=False
+        )
+        results = dict(results)
+        self.assertEqual(self.answer, results[4])
+        self.assertIsInstance(results[5], solvers.SolvingError)
+        self.assertEqual(list(range(6)), sorted(results))
+    
+    def test_encoding(self):
+        error = solvers.BudgetExceeded(
+            "Out of nodes", reason='nodes', solutions=[ self.answer ], 
+            nodes=5, elapsed=0.5
+        )
+        for result in ([ self.answer ], self.answer, error, 
+                solvers.SolvingError("Broken")):
+            entry = encoding.encode(result)
+            self.assertEqual(entry, encoding.encode(
+                encoding.decode(entry, CORRECT_INCOMPLETE_NATIVE)
+            ))
+        decoded = encoding.decode(
+            encoding.encode(error), self.broken
+        )
+        self.assertIsInstance(decoded, solvers.BudgetExceeded)
+        self.assertEqual(
+            ('nodes', [ self.answer ], 5, self.broken), 
+            (decoded.reason, decoded.solutions, decoded.nodes, decoded.sudoku)
+        )
+        self.assertEqual(
+            encoding.ERROR, 
+            encoding.solve(solvers.splitting_solver, self.broken)[0]
+        )
+    
+    def test_map_chunks(self):
+        results = batch.map_chunks(
+            lambda offset, chunk: [ offset + item for item in chunk ], 
+            batch.chunks(range(5), 2), (10,), workers=0
+        )
+        self.assertEqual(
+            [(0, [0, 1], [10, 11]), (2, [2, 3], [12, 13]), (4, [4], [14])], 
+            list(results)
+        )
+
+class TestGenerator(unittest.TestCase):
+    def check_puzzle(self, puzzle, solution):
+        self.assertEqual(1, dlx.count_solutions(puzzle))
+        self.assertEqual([solution], dlx.dlx_solver(puzzle))
+    
+    def test_random_grid(self):
+        import random
+        grid = generator.random_grid(random.Random(1))
+        self.assertTrue(grid.filled)
+        self.assertTrue(grid.is_valid())
+    
+    def test_generate(self):
+        puzzle, solution = generator.generate(1)
+        self.check_puzzle(puzzle, solution)
+        self.assertEqual(puzzle, generator.generate(1)[0])
+        cells = puzzle.cells
+        for index in range(81): # Minimal, no clue can be removed
+            if cells[index] != 0:
+                reduced = puzzle.copy()
+                reduced.cells[index] = 0
+                self.assertEqual(2, dlx.count_solutions(reduced))
+    
+    def test_generate_symmetry_target(self):
+        puzzle, solution = generator.generate(2, 'rotational', target=40)
+        self.check_puzzle(puzzle, solution)
+        self.assertEqual(40, 81 - puzzle.cells.count(0))
+        cells = puzzle.cells
+        for index in range(81):
+            self.assertEqual(cells[index] == 0, cells[80 - index] == 0)
+        self.assertRaises(ValueError, generator.generate, 2, 'spiral')
+    
+    def test_generate_many(self):
+        puzzles = list(generator.generate_many(4, seed=3, workers=0))
+        self.assertEqual(puzzles, list(
+            generator.generate_many(4, seed=3, workers=2, chunksize=1)
+        ))
+        for puzzle, solution in puzzles:
+            self.check_puzzle(puzzle, solution)
+
+class TestTechniques(unittest.TestCase):
+    def setUp(self):
+        path = os.path.join(bench.CORPORA_DIR, 'hard.txt')
+        self.sudokus = bench.load_corpus(path)
+    
+    def test_techniques(self):
+        for sudoku_ in self.sudokus:
+            solution = dlx.dlx_solver(sudoku_)[0].cells
+            sudoku_ = sudoku_.copy()
+            map_ = solvers.Map(sudoku_)
+            while not map_.is_done() and any(technique(sudoku_, map_) 
+                    for technique in techniques.TECHNIQUES.values()):
+                pass
+            for index in range(81): # Nothing true was removed
+                value = sudoku_.cells[index]
+                if value == 0:
+                    self.assertTrue(map_.candidates[index] & solution[index])
+                else:
+                    self.assertEqual(solution[index], value)
+    
+    def test_undo(self):
+        sudoku_ = self.sudokus[3].copy()
+        map_ = solvers.Map(sudoku_)
+        candidates = map_.candidates[:]
+        mark = map_.mark()
+        self.assertTrue(techniques.locked_candidates(sudoku_, map_))
+        self.assertNotEqual(candidates, map_.candidates)
+        map_.undo(mark)
+        self.assertEqual(candidates, map_.candidates)
+    
+    def test_pipeline(self):
+        self.assertEqual(
+            (techniques.locked_candidates, techniques.x_wing), 
+            techniques.pipeline('locked_candidates', 'x_wing')
+        )
+        self.assertRaises(ValueError, techniques.pipeline, 'guessing')
+        sudoku_ = self.sudokus[0]
+        self.assertRaises(
+            solvers.SolvingError, solvers.simple_solver, sudoku_.copy()
+        )
+        solution = solvers.simple_solver(
+            sudoku_.copy(), techniques=techniques.PIPELINE
+        )
+        self.assertEqual(dlx.dlx_solver(sudoku_), [solution])
+        self.assertEqual(
+            [solution], register.Register.get_solver('logic_split')(sudoku_)
+        )
+    
+    def test_splitting_solver(self):
+        for sudoku_ in self.sudokus:
+            plain, logic = stats.Stats(), stats.Stats()
+            self.assertEqual(
+                solvers.splitting_solver(sudoku_, plain), 
+                solvers.splitting_solver(sudoku_, logic, techniques.PIPELINE)
+            )
+            self.assertLess(logic.counters['nodes'], plain.counters['nodes'])
+    
+    def test_grade(self):
+        result = grader.grade(CORRECT_INCOMPLETE_NATIVE)
+        self.assertTrue(result.solved)
+        self.assertEqual(grader.COSTS['hidden_single'], result.rating)
+        self.assertEqual(['hidden_single'], list(result.techniques))
+        self.assertEqual(51, CORRECT_INCOMPLETE_NATIVE.cells.count(0))
+        result = grader.grade(self.sudokus[0])
+        self.assertTrue(result.solved)
+        self.assertGreater(result.rating, grader.COSTS['hidden_single'])
+        result = grader.grade(self.sudokus[-1])
+        self.assertFalse(result.solved)
+        self.assertEqual(grader.GUESSING, result.rating)
+
+class TestVectorized(unittest.TestCase):
+    def setUp(self):
+        self.broken = CORRECT_INCOMPLETE_NATIVE.copy()
+        self.broken.set_cell(0, 2, 16)
+        path = os.path.join(bench.CORPORA_DIR, 'hard.txt')
+        self.sudokus = [ CORRECT_INCOMPLETE_NATIVE, self.broken ] + \
+            bench.load_corpus(path)[:3]
+    
+    def check_results(self, results):
+        self.assertEqual(5, len(results))
+        self.assertIsInstance(results[1], solvers.SolvingError)
+        self.assertEqual(self.broken, results[1].sudoku)
+        for sudoku_, result in zip(self.sudokus[::2], results[::2]):
+            self.assertEqual(dlx.dlx_solver(sudoku_), result)
+    
+    def test_solve_boards(self):
+        self.check_results(list(
+            vectorized.solve_boards(self.sudokus, blocksize=2)
+        ))
+    
+    def test_solve_boards_without_numpy(self):
+        numpy = vectorized.numpy
+        vectorized.numpy = None
+        try:
+            self.check_results(list(vectorized.solve_boards(self.sudokus)))
+            self.assertRaises(RuntimeError, vectorized.to_array, self.sudokus)
+        finally:
+            vectorized.numpy = numpy
+    
+    @unittest.skipIf(vectorized.numpy is None, "NumPy is not installed")
+    def test_propagate_array(self):
+        boards = vectorized.to_array(self.sudokus)
+        self.assertEqual((5, 81), boards.shape)
+        self.assertEqual(
+            [True, False, True, True, True], 
+            vectorized.valid_array(boards).tolist()
+        )
+        broken = vectorized.propagate_array(boards)
+        self.assertEqual([False, True, False, False, False], broken.tolist())
+        solved = vectorized.from_array(boards)
+        self.assertEqual(
+            solvers.simple_solver(CORRECT_INCOMPLETE_NATIVE.copy()), solved[0]
+        )
+        self.assertEqual(self.broken, solved[1])
+
+class TestCanonical(unittest.TestCase):
+    def setUp(self):
+        path = os.path.join(bench.CORPORA_DIR, '17-clue.txt')
+        self.sudokus = [ CORRECT_INCOMPLETE_NATIVE ] + bench.load_corpus(path)
+        self.transforms = [
+            canonical.Transform(
+                True, (3, 5, 4, 7, 6, 8, 2, 0, 1), (1, 2, 0, 4, 3, 5, 7, 8, 6), 
+                (0, 4, 7, 1, 9, 2, 3, 8, 5, 6)
+            ), 
+            canonical.Transform(
+                False, (8, 7, 6, 5, 4, 3, 2, 1, 0), 
+                (0, 2, 1, 3, 5, 4, 6, 7, 8), (0, 9, 8, 7, 6, 5, 4, 3, 2, 1)
+            )
+        ]
+    
+    def test_transform(self):
+        transform = self.transforms[0]
+        moved = transform.apply(CORRECT_INCOMPLETE_NATIVE)
+        self.assertTrue(moved.is_valid())
+        self.assertEqual(51, moved.cells.count(0))
+        self.assertEqual(CORRECT_INCOMPLETE_NATIVE, transform.revert(moved))
+    
+    def test_canonicalize(self):
+        for sudoku_ in self.sudokus:
+            form, transform = canonical.canonicalize(sudoku_)
+            self.assertEqual(form, transform.apply(sudoku_))
+            self.assertEqual(sudoku_, transform.revert(form))
+            for moved in (transform.apply(sudoku_) 
+                    for transform in self.transforms):
+                self.assertEqual(form, canonical.canonical_form(moved))
+                self.assertEqual(
+                    canonical.canonical_hash(sudoku_), 
+                    canonical.canonical_hash(moved)
+                )
+        data = canonical.canonical_form(CORRECT_INCOMPLETE_NATIVE).to_bytes()
+        self.assertEqual(b'\x01\x02\x03\x04\x05\x00', data[:6])
+        self.assertNotEqual(
+            canonical.canonical_hash(self.sudokus[1]), 
+            canonical.canonical_hash(self.sudokus[2])
+        )
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        self.broken = CORRECT_INCOMPLETE_NATIVE.copy()
+        self.broken.set_cell(0, 2, 16)
+        self.answer = dlx.dlx_solver(CORRECT_INCOMPLETE_NATIVE)
+    
+    def test_solve(self):
+        solution_cache = cache.SolutionCache(max_entries=2)
+        for i in range(3):
+            self.assertEqual(
+                self.answer, solution_cache.solve(CORRECT_INCOMPLETE_NATIVE)
+            )
+            self.assertRaises(
+                solvers.SolvingError, solution_cache.solve, self.broken
+            )
+        counters = solution_cache.stats.counters
+        self.assertEqual({'misses': 2, 'hits': 4}, counters)
+        solver = solution_cache.get_solver('simple')
+        self.assertEqual(self.answer[0], solver(CORRECT_INCOMPLETE_NATIVE))
+        self.assertEqual(2, len(solution_cache))
+        self.assertEqual(1, counters['evictions'])
+        self.assertRaises( # Least recently used was evicted
+            solvers.SolvingError, solution_cache.solve, self.broken
+        )
+        self.assertEqual(5, counters['hits'])
+        solution_cache.max_bytes = 200
+        solution_cache.solve(CORRECT_INCOMPLETE_NATIVE)
+        self.assertEqual(4, counters['misses'])
+        self.assertEqual(1, len(solution_cache))
+        self.assertEqual(4 + 81 + 81, solution_cache.size)
+    
+    def test_canonical(self):
+        solution_cache = cache.SolutionCache(canonical=True)
+        transform = canonical.Transform(
+            True, (3, 5, 4, 7, 6, 8, 2, 0, 1), (1, 2, 0, 4, 3, 5, 7, 8, 6), 
+            (0, 4, 7, 1, 9, 2, 3, 8, 5, 6)
+        )
+        moved = transform.apply(CORRECT_INCOMPLETE_NATIVE)
+        self.assertEqual(
+            self.answer, solution_cache.solve(CORRECT_INCOMPLETE_NATIVE)
+        )
+        self.assertEqual(
+            [transform.apply(self.answer[0])], solution_cache.solve(moved)
+        )
+        self.assertEqual(
+            {'misses': 1, 'hits': 1}, solution_cache.stats.counters
+        )
+    
+    def test_limit_and_budget(self):
+        solution_cache = cache.SolutionCache()
+        solver = solution_cache.get_solver('dlx')
+        empty = sudoku.NativeSudoku.from_cells([ 0 ] * 81)
+        for i in range(2):
+            self.assertEqual(3, len(solver(empty, limit=3)))
+            with self.assertRaises(solvers.BudgetExceeded) as context:
+                solver(empty, budget=solvers.Budget(solutions=2))
+            self.assertEqual(2, len(context.exception.solutions))
+        self.assertEqual(
+            {'misses': 3, 'hits': 1}, solution_cache.stats.counters
+        )
+        self.assertEqual(1, len(solution_cache))
+    
+    def test_store_again(self):
+        solution_cache = cache.SolutionCache(max_bytes=200)
+        key, form, transform = solution_cache.key(
+            CORRECT_INCOMPLETE_NATIVE, 'dlx'
+        )
+        entry = (encoding.MANY, [ self.answer[0].to_bytes() ])
+        for i in range(5):
+            solution_cache.put(key, entry)
+        self.assertEqual(1, len(solution_cache))
+        self.assertEqual(len(key) + 81, solution_cache.size)
+        self.assertNotIn('evictions', solution_cache.stats.counters)
+    
+    def test_put_again(self):
+        solution_cache = cache.SolutionCache(max_entries=2)
+        keys = [
+            solution_cache.key(CORRECT_INCOMPLETE_NATIVE, solver)[0]
+            for solver in ('dlx', 'split', 'simple')
+        ]
+        solution_cache.put(keys[0], (encoding.ERROR, "Old"))
+        solution_cache.put(keys[1], (encoding.ERROR, "Other"))
+        solution_cache.put(keys[0], (encoding.ERROR, "New"))
+        self.assertEqual(2, len(solution_cache))
+        self.assertEqual(
+            len(keys[0]) + 3 + len(keys[1]) + 5, solution_cache.size
+        )
+        solution_cache.put(keys[2], (encoding.ERROR, "Last"))
+        self.assertIsNone(solution_cache.lookup(keys[1])) # Least recent
+        self.assertEqual(
+            (encoding.ERROR, "New"), solution_cache.lookup(keys[0])
+        )
+    
+    def test_persistent(self):
+        import tempfile
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'cache')
+            with cache.SolutionCache(path=path) as solution_cache:
+                solution_cache.solve(CORRECT_INCOMPLETE_NATIVE)
+            with cache.SolutionCache(path=path) as solution_cache:
+                self.assertEqual(
+                    self.answer, solution_cache.solve(CORRECT_INCOMPLETE_NATIVE)
+                )
+                self.assertEqual(
+                    {'disk_hits': 1}, solution_cache.stats.counters
+                )
+
+class TestBinary(unittest.TestCase):
+    def setUp(self):
+        import tempfile
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, 'sudokus.lsdk')
+        self.answer = dlx.dlx_solver(CORRECT_INCOMPLETE_NATIVE)[0]
+    
+    def tearDown(self):
+        self.directory.cleanup()
+    
+    def test_pack(self):
+        data = binary.pack(CORRECT_INCOMPLETE_NATIVE)
+        self.assertEqual(41, len(data))
+        self.assertEqual(b'\x53\x00\x70', data[:3])
+        self.assertEqual(CORRECT_INCOMPLETE_NATIVE, binary.unpack(data))
+    
+    def test_write_read(self):
+        sudokus = [ CORRECT_INCOMPLETE_NATIVE, self.answer ] * 3
+        self.assertEqual(6, binary.write(
+            self.path, sudokus, [ self.answer ] * 6, {'source': 'tests'}
+        ))
+        with binary.BinaryReader(self.path) as reader:
+            self.assertEqual(6, len(reader))
+            self.assertTrue(reader.has_solutions)
+            self.assertEqual({'source': 'tests'}, reader.metadata)
+            self.assertEqual(sudokus, list(reader))
+            self.assertEqual(self.answer, reader[-1])
+            self.assertEqual(self.answer, reader.solution(2))
+            self.assertRaises(IndexError, reader.__getitem__, 6)
+            self.assertEqual(
+                list(zip(sudokus[1:3], [ self.answer ] * 2)), 
+                list(reader.sudokus(1, 3, solutions=True, block_size=1))
+            )
+            self.assertEqual(
+                binary.pack(CORRECT_INCOMPLETE_NATIVE), 
+                reader.raw(0)[:binary.PACKED_SIZE].tobytes()
+            )
+    
+    def test_write_mismatch(self):
+        for solutions in ([ self.answer ], [ self.answer ] * 3):
+            self.assertRaises(
+                ValueError, binary.write, self.path, 
+                [ CORRECT_INCOMPLETE_NATIVE ] * 2, solutions
+            )
+            self.assertRaises(ValueError, binary.BinaryReader, self.path)
+    
+    def test_convert(self):
+        line = ''.join(str(digit) if digit else '.' 
+            for digit in CORRECT_INCOMPLETE_NATIVE.to_bytes())
+        lines = [ line, 'broken' ]
+        self.assertEqual((1, 1), binary.convert(lines, self.path))
+        with binary.BinaryReader(self.path) as reader:
+            self.assertFalse(reader.has_solutions)
+            self.assertIsNone(reader.metadata)
+            self.assertEqual([CORRECT_INCOMPLETE_NATIVE], list(reader))
+            self.assertRaises(ValueError, reader.solution, 0)
+        with open(self.path, 'wb') as file_:
+            file_.write(b'not a binary file' * 4)
+        self.assertRaises(ValueError, binary.BinaryReader, self.path)
+
+class TestService(unittest.TestCase):
+    def setUp(self):
+        self.broken = CORRECT_INCOMPLETE_NATIVE.copy()
+        self.broken.set_cell(0, 2, 16)
+        self.answer = dlx.dlx_solver(CORRECT_INCOMPLETE_NATIVE)
+    
+    async def client_requests(self, solving_service):
+        server = await solving_service.serve()
+        port = server.sockets[0].getsockname()[1]
+        async with server, await service.Client.connect(
+                '127.0.0.1', port) as client:
+            results = await asyncio.gather(
+                *(client.solve(CORRECT_INCOMPLETE_NATIVE) for i in range(8)), 
+                client.solve(self.broken), 
+                client.request(sudoku='1'), 
+                client.request(sudoku='.'*81, solver='split', limit=2), 
+                return_exceptions=True
+            )
+            self.assertEqual(
+                self.answer, await client.solve(CORRECT_INCOMPLETE_NATIVE)
+            )
+        return results
+    
+    def test_client(self):
+        solving_service = service.SolvingService(workers=0)
+        async def run():
+            async with solving_service:
+                return await self.client_requests(solving_service)
+        results = asyncio.run(run())
+        self.assertEqual([self.answer] * 8, results[:8])
+        self.assertIsInstance(results[8], solvers.SolvingError)
+        self.assertEqual({'id': 10, 'error': "Not enough input"}, results[9])
+        self.assertEqual(2, len(results[10]['solutions']))
+        counters = solving_service.stats.counters
+        self.assertEqual(11, counters['requests'])
+        self.assertEqual(7, counters['coalesced'])
+        self.assertEqual(1, solving_service.cache.stats.counters['hits'])
+    
+    def test_bad_requests(self):
+        async def run():
+            async with service.SolvingService(workers=0) as solving_service:
+                server = await solving_service.serve()
+                port = server.sockets[0].getsockname()[1]
+                async with server, await service.Client.connect(
+                        '127.0.0.1', port) as client:
+                    responses = await asyncio.gather(
+                        client.request(sudoku='.'*81, limit=[1]), 
+                        client.request(sudoku='.'*81, limit=0), 
+                        client.request(sudoku=5), 
+                        client.request(sudoku='.'*81, solver=['dlx'])
+                    )
+                    for response in responses:
+                        self.assertIn('error', response)
+                    self.assertEqual(
+                        self.answer, 
+                        await client.solve(CORRECT_INCOMPLETE_NATIVE)
+                    )
+        asyncio.run(run())
+    
+    def test_timeout(self):
+        async def run():
+            async with service.SolvingService(
+                    workers=0, timeout=0, budget=solvers.Budget()
+                    ) as solving_service:
+                with self.assertRaises(TimeoutError):
+                    await solving_service.solve(CORRECT_INCOMPLETE_NATIVE)
+                result = await solving_service.solve(
+                    CORRECT_INCOMPLETE_NATIVE, timeout=10
+                )
+                self.assertEqual(self.answer, result)
+                self.assertEqual(
+                    1, solving_service.stats.counters['timeouts']
+                )
+        asyncio.run(run())
+
+class TestBench(unittest.TestCase):
+    def test_run(self):
+        path = os.path.join(bench.CORPORA_DIR, 'invalid.txt')
+        report = bench.run(['split', 'dlx'], {'invalid': path}, memory=False)
+        for solver in ('split', 'dlx'):
+            result = report['results'][solver]['invalid']
+            self.assertEqual(12, result['puzzles'])
+            self.assertEqual(12, result['failed'])
+            self.assertTrue(result['complete'])
+        self.assertEqual([], bench.compare(report, report))
+        slower = json.loads(json.dumps(report))
+        slower['results']['dlx']['invalid']['puzzles_per_second'] /= 2
+        self.assertEqual([], bench.compare(report, slower))
+        self.assertEqual(1, len(bench.compare(slower, report)))
+    
+    def test_compare_p99(self):
+        result = {
+            'puzzles': 12, 'complete': True, 'puzzles_per_second': 100.0, 
+            'p99_ms': 1.0
+        }
+        report = { 'results': { 'dlx': { 'invalid': result } } }
+        slower = json.loads(json.dumps(report))
+        slower['results']['dlx']['invalid']['p99_ms'] = 2.0
+        self.assertEqual([], bench.compare(slower, report))
+        for run in (report, slower):
+            run['results']['dlx']['invalid']['puzzles'] = \
+                bench.MIN_P99_PUZZLES
+        self.assertEqual(1, len(bench.compare(slower, report)))
+        path = os.path.join(bench.CORPORA_DIR, 'generated.txt')
+        self.assertGreaterEqual(
+            len(bench.load_corpus(path)), bench.MIN_P99_PUZZLES
+        )
+    
+    def test_startup(self):
+        startup = bench.run_startup(repeat=1)
+        self.assertEqual(1, startup['runs'])
+        self.assertGreater(startup['p50_ms'], startup['interpreter_ms'] / 2)
+        report = { 'results': {}, 'startup': startup }
+        slower = { 'results': {}, 'startup': dict(startup) }
+        slower['startup']['p50_ms'] *= 2
+        self.assertEqual([], bench.compare(slower, slower))
+        self.assertEqual(1, len(bench.compare(slower, report)))
+
+class TestFrontend(unittest.TestCase):
+    def setUp(self):
+        path = os.path.join(bench.CORPORA_DIR, 'multiple.txt')
+        with open(path) as file_:
+            self.multiple = file_.readline().strip()
+        self.solution = printers.format_as_list(
+            dlx.dlx_solver(parsers.native_parser(self.multiple), limit=1)[0]
+        ).rstrip("\n")
+    
+    def run_solver(self, *args) -> str:
+        """Runs the frontend, returns what it wrote to stdout"""
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            solver.main('-r', 'native', '-p', 'list', *args)
+        return output.getvalue()
+    
+    def test_single(self):
+        for jobs in ((), ('-j', '1')):
+            self.assertEqual(self.solution + "\n", self.run_solver(
+                '-s', 'dlx', '-1', *jobs, '-i', self.multiple
+            ))
+        self.assertEqual(self.solution + "\n", self.run_solver(
+            '-s', 'bitboard', '-1', '-i', self.multiple
+        ))
+    
+    def test_solutions(self):
+        output = self.run_solver('-s', 'split', '-i', self.multiple)
+        self.assertEqual(25, output.count("Solution "))
+        self.assertIn("Solution 1:\n" + self.solution + "\n", output)
+        self.assertEqual(output, self.run_solver(
+            '-s', 'split', '-j', '1', '-i', self.multiple
+        ))
+    
+    def test_count(self):
+        self.assertEqual("2\n", self.run_solver('-c', '-i', self.multiple))
+        self.assertEqual(
+            "25\n", self.run_solver('-c', '100', '-i', self.multiple)
+        )
+    
+    def test_lines(self):
+        outputs = []
+        for jobs in ((), ('-j', '2')):
+            stdin = sys.stdin
+            sys.stdin = io.StringIO(self.multiple + "\n" + "1"*81 + "\n")
+            try:
+                outputs.append(self.run_solver(
+                    '-s', 'dlx', '-1', '-l', *jobs, '-f', '-'
+                ))
+            finally:
+                sys.stdin = stdin
+        self.assertEqual([ self.solution + "\nSolver returned error "
+            "'Broken sudoku, didn't start solving'\n" ] * 2, outputs)
+    
+    def test_stats(self):
+        for jobs in ((), ('-j', '1')):
+            lines = self.run_solver(
+                '-s', 'split', '-1', '--stats', *jobs, '-i', self.multiple
+            ).splitlines()
+            self.assertEqual(self.solution, lines[0])
+            self.assertEqual(
+                1, json.loads(lines[1])['counters']['solutions']
+            )
+    
+    def test_budget(self):
+        output = self.run_solver(
+            '-s', 'dlx', '--max-nodes', '1', '-i', self.multiple
+        )
+        self.assertEqual(
+            "Solver returned error 'Budget exceeded: nodes'\n", output
+        )
+        for jobs in ((), ('-j', '1')):
+            self.assertEqual(
+                "Solution 1:\n" + self.solution + "\nSolver returned error "
+                "'Budget exceeded: solutions'\n", 
+                self.run_solver(
+                    '-s', 'dlx', '--max-solutions', '1', *jobs, 
+                    '-i', self.multiple
+                )
+            )
 
 def load_tests(loader, tests, ignored):
     """Loads doctests"""
-    for module in (parsers, printers, sudoku, solvers):
+    for module in (batch, bench, parsers, printers, sudoku, solvers):
         tests.addTests(
             doctest.DocTestSuite(module, extraglobs={
                     'sudoku':CORRECT_INCOMPLETE_NATIVE,